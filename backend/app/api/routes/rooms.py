@@ -1,15 +1,70 @@
 """
 Contains all room-related API routes.
+
+Routes are async so they run on the event loop rather than in a threadpool,
+and every mutation of an existing room goes through that room's actor. Room
+creation, including by the matchmaker, runs directly on the loop; see
+ActorSystem.
 """
 
+import os
+from collections.abc import Callable
+
+from app.models.actor import ActorSystem
+from app.models.cache import STATS, SerializationStats
+from app.models.leaderboard import Standing
 from app.models.manager import Manager
 from app.models.match import MatchSettings
+from app.models.matchmaking import Matchmaker, MatchmakingStats, QuickJoinResult
 from app.models.player import Player
-from app.models.room import Room
-from fastapi import APIRouter, HTTPException, status
+from app.models.room import Room, RoomPage, RoomStatus
+from app.ws.backplane import claim_slot
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+
+
+def worker_partition() -> dict[str, int]:
+    """
+    Returns the room code partition of this worker as Manager arguments.
+    Workers sharing a backplane, enabled by NUMRACER_BACKPLANE_DIR, split the
+    code space NUMRACER_WORKERS ways, and each claims its own slot in the
+    backplane directory, so their room codes never collide even when they
+    are started with the same environment.
+
+    Raises:
+        RuntimeError: If the backplane is enabled without a number of
+                      workers, or every slot is already taken.
+    """
+    if not (directory := os.environ.get("NUMRACER_BACKPLANE_DIR")):
+        return {}
+
+    if (workers := os.environ.get("NUMRACER_WORKERS")) is None:
+        raise RuntimeError(
+            "NUMRACER_WORKERS must be set when NUMRACER_BACKPLANE_DIR is."
+        )
+
+    return {
+        "worker_id": claim_slot(directory, int(workers)),
+        "workers": int(workers),
+    }
+
 
 router = APIRouter(prefix="/rooms", tags=["room"])
-manager = Manager()
+manager = Manager(**worker_partition())
+actors = ActorSystem(manager)
+matchmaker = Matchmaker(manager)
+score_hooks: list[Callable[[str, str, int], None]] = []
+"""
+Functions called with the room ID, player name and new score whenever an
+answer sent over HTTP scores, such as the websocket score broadcast.
+"""
 
 
 ROOM_NOT_FOUND = HTTPException(
@@ -18,27 +73,206 @@ ROOM_NOT_FOUND = HTTPException(
 )
 
 
+def not_modified(request: Request, etag: str) -> bool:
+    """
+    Returns whether the request's If-None-Match header matches the given ETag.
+    """
+    if (header := request.headers.get("if-none-match")) is None:
+        return False
+
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
 @router.get(
     "/{room_id}",
     response_model=Room,
-    responses={404: {"description": "Room not found"}},
+    responses={
+        304: {"description": "Room not modified"},
+        404: {"description": "Room not found"},
+    },
 )
-def get_room(room_id: str) -> Room:
+async def get_room(room_id: str, request: Request) -> Response:
     """
-    Returns the room with the given ID.
+    Returns the room with the given ID, with its creation serial and version
+    as the ETag, so a room that reuses an old code never matches the old
+    room's ETag. Answers 304 Not Modified if the client's If-None-Match
+    already has that ETag. The room's JSON is cached until it next changes.
     """
     if room := manager.get_room(room_id):
-        return room
+        etag = f'"{room.id}.{manager.serial_of(room_id)}.{room.version}"'
+        if not_modified(request, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        return Response(
+            content=room.dump_json(),
+            media_type="application/json",
+            headers={"ETag": etag},
+        )
 
     raise ROOM_NOT_FOUND
 
 
-@router.get("/", response_model=list[Room])
-def get_rooms() -> list[Room]:
+@router.get(
+    "/{room_id}/leaderboard",
+    responses={404: {"description": "Room or match not found"}},
+)
+async def get_leaderboard(
+    room_id: str,
+    k: int = Query(default=10, ge=0, le=100),
+    player: str | None = None,
+) -> list[Standing]:
+    """
+    Returns the standings of the top k players in the room's current match,
+    or of the given player and the k players ranked directly above and below
+    them.
+    """
+    if room := manager.get_room(room_id):
+        if match := room.current_match:
+            leaderboard = match.leaderboard
+            if player is None:
+                return leaderboard.top(k)
+            return leaderboard.neighbors(player, k)
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Room or match not found",
+    )
+
+
+@router.get("/stats/serialization")
+async def get_serialization_stats() -> dict[str, SerializationStats]:
+    """
+    Returns the serialization cache statistics of each cached model.
+    """
+    return STATS
+
+
+@router.get(
+    "/",
+    response_model=RoomPage,
+    responses={
+        304: {"description": "Rooms not modified"},
+        400: {"description": "Invalid cursor"},
+    },
+)
+async def get_rooms(
+    request: Request,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(default=50, ge=1, le=100),
+    room_status: RoomStatus | None = Query(default=None, alias="status"),
+    max_players: int | None = Query(default=None, ge=0),
+    settings_digest: str | None = None,
+    host: str | None = None,
+) -> RoomPage | Response:
     """
-    Returns a list of all active rooms.
+    Returns one page of active rooms as lightweight summaries, filtered
+    server-side through the manager's secondary indexes. Pass the returned
+    next_cursor to get the following page. The lobby version is the ETag,
+    and 304 Not Modified is answered if the client's If-None-Match already
+    has that version.
     """
-    return manager.get_rooms()
+    etag = f'"{manager.version}"'
+    if not_modified(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    if cursor is not None and not cursor.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    rooms, next_cursor = manager.list_rooms(
+        cursor=int(cursor) if cursor is not None else None,
+        limit=limit,
+        status=room_status,
+        max_players=max_players,
+        settings_digest=settings_digest,
+        host=host,
+    )
+
+    response.headers["ETag"] = etag
+    return RoomPage(
+        rooms=[room.summary() for room in rooms],
+        next_cursor=str(next_cursor) if next_cursor is not None else None,
+    )
+
+
+@router.get(
+    "/locate/{player}",
+    responses={404: {"description": "Player not in a room"}},
+)
+async def locate_player(player: str) -> str:
+    """
+    Returns the ID of the room the given player is in.
+    """
+    if room_id := manager.locate(player):
+        return room_id
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Player not in a room",
+    )
+
+
+@router.post(
+    "/quick_join",
+    responses={
+        409: {"description": "Player already in a room"},
+        422: {"description": "Invalid match settings"},
+    },
+)
+async def quick_join(
+    player: str, settings: MatchSettings | None = None
+) -> QuickJoinResult:
+    """
+    Queues a player for a match with the given settings, or the default
+    settings if none are given. Once enough players are waiting with equal
+    settings, a room is created for them and its match is started. Queued
+    players find their room with /rooms/locate/{player}. Settings that
+    cannot generate problems are rejected before the player is queued.
+    """
+    if result := matchmaker.join(Player(name=player), settings or MatchSettings()):
+        return result
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Player already in a room",
+    )
+
+
+@router.post(
+    "/quick_join/leave",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        204: {"description": "Player left the queue"},
+        404: {"description": "Player not queued"},
+    },
+)
+async def leave_quick_join(player: str) -> None:
+    """
+    Removes a player from the matchmaking queue.
+    """
+    if matchmaker.leave(player):
+        return None
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Player not queued",
+    )
+
+
+@router.get("/quick_join/stats")
+async def get_quick_join_stats() -> MatchmakingStats:
+    """
+    Returns the depth of the matchmaking queue and recent wait times.
+    """
+    return matchmaker.stats()
 
 
 @router.post(
@@ -46,13 +280,20 @@ def get_rooms() -> list[Room]:
     status_code=status.HTTP_201_CREATED,
     responses={
         201: {"description": "Room created successfully"},
+        409: {"description": "Host already in a room"},
     },
 )
-def create_room(host: str) -> str:
+async def create_room(host: str) -> str:
     """
     Creates a new room with the given player as the host.
     """
-    return manager.create_room(Player(name=host))
+    if room_id := manager.create_room(Player(name=host)):
+        return room_id
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Host already in a room",
+    )
 
 
 @router.delete(
@@ -63,11 +304,11 @@ def create_room(host: str) -> str:
         404: {"description": "Room not found"},
     },
 )
-def delete_room(room_id: str) -> None:
+async def delete_room(room_id: str) -> None:
     """
     Deletes the room with the given ID.
     """
-    if manager.delete_room(room_id):
+    if await actors.call(room_id, manager.delete_room, room_id):
         return None
 
     raise ROOM_NOT_FOUND
@@ -77,11 +318,11 @@ def delete_room(room_id: str) -> None:
     "/add/{room_id}",
     responses={404: {"description": "Room or player not found"}},
 )
-def add_player(room_id: str, player: str) -> bool:
+async def add_player(room_id: str, player: str) -> bool:
     """
     Adds a player to the room with the given ID.
     """
-    if manager.add_player(room_id, Player(name=player)):
+    if await actors.call(room_id, manager.add_player, room_id, Player(name=player)):
         return True
 
     raise HTTPException(
@@ -98,12 +339,12 @@ def add_player(room_id: str, player: str) -> bool:
         404: {"description": "Room not found"},
     },
 )
-def remove_player(room_id: str, player: str) -> None:
+async def remove_player(room_id: str, player: str) -> None:
     """
     Removes a player from the room with the given ID. If no more players
     remain in the room, the room is deleted.
     """
-    if manager.remove_player(room_id, Player(name=player)):
+    if await actors.call(room_id, manager.remove_player, room_id, Player(name=player)):
         return None
 
     raise ROOM_NOT_FOUND
@@ -115,13 +356,14 @@ def remove_player(room_id: str, player: str) -> None:
     responses={
         204: {"description": "Settings updated successfully"},
         404: {"description": "Room not found"},
+        422: {"description": "Invalid settings"},
     },
 )
-def update_settings(room_id: str, settings: dict) -> None:
+async def update_settings(room_id: str, settings: MatchSettings) -> None:
     """
     Update the match settings for the room with the given ID.
     """
-    if manager.update_settings(room_id, MatchSettings(**settings)):
+    if await actors.call(room_id, manager.update_settings, room_id, settings):
         return None
 
     raise ROOM_NOT_FOUND
@@ -135,11 +377,11 @@ def update_settings(room_id: str, settings: dict) -> None:
         404: {"description": "Room not found"},
     },
 )
-def start_match(room_id: str) -> None:
+async def start_match(room_id: str) -> None:
     """
     Starts the match for the room with the given ID.
     """
-    if manager.start_match(room_id):
+    if await actors.call(room_id, manager.start_match, room_id):
         return None
 
     raise ROOM_NOT_FOUND
@@ -153,11 +395,11 @@ def start_match(room_id: str) -> None:
         404: {"description": "Room not found"},
     },
 )
-def end_match(room_id: str) -> None:
+async def end_match(room_id: str) -> None:
     """
     Ends the match for the room with the given ID.
     """
-    if manager.end_match(room_id):
+    if await actors.call(room_id, manager.end_match, room_id):
         return None
 
     raise ROOM_NOT_FOUND
@@ -169,12 +411,26 @@ def end_match(room_id: str) -> None:
         404: {"description": "Room, match, or player not found"},
     },
 )
-def handle_answer(room_id: str, player: str, answer: int) -> bool:
+async def handle_answer(
+    room_id: str, player: str, answer: int, background_tasks: BackgroundTasks
+) -> bool:
     """
-    Handles a player's answer for the room with the given ID."""
-    verdict = manager.handle_answer(room_id, Player(name=player), answer)
+    Handles a player's answer for the room with the given ID. A correct
+    answer is passed to the score hooks, and the match's problem deck is
+    topped up after the response is sent.
+    """
+    verdict = await actors.call(
+        room_id, manager.handle_answer, room_id, Player(name=player), answer
+    )
 
     if verdict is not None:
+        if verdict:
+            room = manager.get_room(room_id)
+            if room is not None and room.current_match is not None:
+                score = room.current_match.players[player].score
+                for hook in score_hooks:
+                    hook(room_id, player, score)
+            background_tasks.add_task(actors.call, room_id, manager.top_up, room_id)
         return verdict
 
     raise HTTPException(
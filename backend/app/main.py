@@ -1,9 +1,41 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
 from app.api.routes import rooms
+from app.ws import handlers
+from app.ws.backplane import UnixSocketBackplane
 from app.ws.manager import WebSocketManager
+from app.ws.schemas import RELAYED_TYPES, MessageType, WebSocketMessage
+from app.ws.sync import StateSync
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers on one host fan out room messages through sockets in this
+    # directory. Each room still lives on the worker that created it.
+    backplane = None
+    if directory := os.environ.get("NUMRACER_BACKPLANE_DIR"):
+        backplane = UnixSocketBackplane(directory)
+        await backplane.start()
+        ws_manager.attach_backplane(backplane)
+
+    ws_manager.start()
+    yield
+    await ws_manager.stop()
+    if backplane is not None:
+        await backplane.stop()
+    rooms.actors.shutdown()
+
+
+ws_manager = WebSocketManager()
+top_ups: set[asyncio.Task] = set()  # Keeps the pending deck top-ups alive.
+state_sync = StateSync(ws_manager.frames)
+ws_manager.add_tick_hook(lambda: state_sync.flush(rooms.manager))
+rooms.score_hooks.append(ws_manager.publish_score)
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,16 +49,71 @@ app.add_middleware(
 app.include_router(rooms.router)
 
 
-ws_manager = WebSocketManager()
-
-
 @app.websocket("/ws/{room_id}/{player}")
 async def websocket_endpoint(websocket: WebSocket, room_id: str, player: str):
-    await ws_manager.connect(room_id, websocket)
+    if (connection := await ws_manager.connect(room_id, websocket, player)) is None:
+        return
+
+    handle_answer = handlers.AnswerHandler(rooms.manager, room_id, player)
 
     try:
         while True:
-            data = await websocket.receive_text()
-            await ws_manager.broadcast(data)
+            try:
+                message = await connection.receive()
+            except ValueError:
+                ws_manager.send(
+                    websocket,
+                    WebSocketMessage(
+                        type=MessageType.ERROR,
+                        room_id=room_id,
+                        player=player,
+                        payload={"detail": "Invalid message"},
+                    ),
+                )
+                continue
+
+            if message.type == MessageType.ANSWER:
+                reply = await rooms.actors.call(room_id, handle_answer, message)
+                if reply.type != MessageType.VERDICT:
+                    ws_manager.send(websocket, reply)
+                    continue
+
+                ws_manager.send_to_player(room_id, player, reply)
+                if reply.payload["correct"]:
+                    ws_manager.publish_score(room_id, player, reply.payload["score"])
+                    # Top the deck up without holding up the next message.
+                    top_up = rooms.actors.call(room_id, rooms.manager.top_up, room_id)
+                    task = asyncio.create_task(top_up)
+                    top_ups.add(task)
+                    task.add_done_callback(top_ups.discard)
+            elif message.type == MessageType.PONG:
+                continue
+            elif message.type == MessageType.PING:
+                ws_manager.send(websocket, WebSocketMessage(type=MessageType.PONG))
+            elif message.type == MessageType.SYNC:
+                state_sync.subscribe(
+                    rooms.manager,
+                    connection,
+                    epoch=message.payload.get("epoch"),
+                    seq=message.payload.get("seq"),
+                )
+            elif message.type in RELAYED_TYPES:
+                ws_manager.broadcast(
+                    room_id,
+                    message.model_copy(update={"room_id": room_id, "player": player}),
+                )
+            else:
+                ws_manager.send(
+                    websocket,
+                    WebSocketMessage(
+                        type=MessageType.ERROR,
+                        room_id=room_id,
+                        player=player,
+                        payload={"detail": f"Cannot send {message.type} messages"},
+                    ),
+                )
     except WebSocketDisconnect:
+        pass
+    finally:
+        state_sync.unsubscribe(connection)
         ws_manager.disconnect(room_id, websocket)
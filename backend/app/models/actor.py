@@ -0,0 +1,147 @@
+"""
+Represents per-room actors that serialize mutations to each room.
+"""
+
+import asyncio
+from typing import Any, Callable, TypeVar
+
+from app.models.manager import Manager
+
+T = TypeVar("T")
+
+_STOP = object()
+
+
+class RoomActor:
+    """
+    Represents the actor that owns one room: a mailbox of mutations and a
+    single consumer task that applies them one at a time, in arrival order.
+
+    The mailbox and task are bound to the event loop they were started on and
+    are restarted if the actor is used from another loop.
+    """
+
+    def __init__(self, room_id: str) -> None:
+        self.room_id = room_id
+        self._mailbox: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the consumer task is running.
+        """
+        return self._task is not None and not self._task.done()
+
+    async def call(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Queues a mutation and waits for the consumer to apply it.
+
+        Args:
+            fn: The function to call.
+            args: The arguments to call the function with.
+
+        Returns:
+            The function's return value. Exceptions raised by the function are
+            re-raised here.
+        """
+        mailbox = self._start()
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        await mailbox.put((fn, args, future))
+        return await future
+
+    def stop(self) -> None:
+        """
+        Stops the consumer once the mutations already queued are applied.
+        """
+        if self.running and self._mailbox is not None:
+            self._mailbox.put_nowait(_STOP)
+
+    def _start(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+
+        if (
+            self._mailbox is None
+            or self._task is None
+            or self._task.done()
+            or self._task.get_loop() is not loop
+        ):
+            self._mailbox = asyncio.Queue()
+            self._task = loop.create_task(self._run(self._mailbox))
+
+        return self._mailbox
+
+    async def _run(self, mailbox: asyncio.Queue) -> None:
+        while (item := await mailbox.get()) is not _STOP:
+            fn, args, future = item
+            if future.cancelled():
+                continue
+
+            try:
+                result = fn(*args)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
+class ActorSystem:
+    """
+    Represents the set of room actors for a manager. Mutations to different
+    rooms proceed independently while mutations to the same room are strictly
+    serialized, without any global lock.
+
+    The actors are not the only writers. Every mutation, through an actor or
+    not, is synchronous code on the same event loop, so none can interleave
+    with another; the actors order the mutations that callers await. Code
+    that creates rooms (Manager.create_room, the matchmaker) or only reads
+    them (the state sync tick) runs directly on the loop, and must not await
+    between reading a room and acting on it.
+    """
+
+    def __init__(self, manager: Manager) -> None:
+        self.manager = manager
+        self.actors: dict[str, RoomActor] = {}
+
+    async def call(self, room_id: str, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Applies a mutation through the actor of the room with the given ID.
+        The actor is stopped if the room no longer exists afterwards.
+
+        Args:
+            room_id: The ID of the room the mutation targets.
+            fn: The function to call.
+            args: The arguments to call the function with.
+
+        Returns:
+            The function's return value.
+        """
+        if (actor := self.actors.get(room_id)) is None:
+            if self.manager.get_room(room_id) is None:
+                # Nothing to serialize against; let fn report the missing room.
+                return fn(*args)
+
+            actor = self.actors[room_id] = RoomActor(room_id)
+
+        try:
+            return await actor.call(fn, *args)
+        finally:
+            if self.manager.get_room(room_id) is None:
+                self.stop(room_id)
+
+    def stop(self, room_id: str) -> None:
+        """
+        Stops and forgets the actor of the room with the given ID, if any.
+
+        Args:
+            room_id: The ID of the room whose actor to stop.
+        """
+        if actor := self.actors.pop(room_id, None):
+            actor.stop()
+
+    def shutdown(self) -> None:
+        """
+        Stops every actor.
+        """
+        for room_id in list(self.actors):
+            self.stop(room_id)
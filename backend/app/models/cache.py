@@ -0,0 +1,61 @@
+"""
+Represents models that cache their serialized JSON between mutations.
+"""
+
+from pydantic import BaseModel, PrivateAttr, computed_field
+
+
+class SerializationStats(BaseModel):
+    """
+    Represents the hit and miss counts of a model's serialization cache.
+    """
+
+    hits: int = 0
+    misses: int = 0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hit_rate(self) -> float:
+        """
+        The fraction of serializations served from the cache.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+STATS: dict[str, SerializationStats] = {}
+"""
+The serialization cache statistics of each cached model, by class name.
+"""
+
+
+class CachedModel(BaseModel):
+    """
+    Represents a model that caches its encoded JSON until one of its mutating
+    methods calls invalidate. Assigning fields directly does not invalidate
+    the cache.
+    """
+
+    _json: bytes | None = PrivateAttr(default=None)
+
+    def invalidate(self) -> None:
+        """
+        Drops the cached JSON, so the next dump_json serializes again.
+        """
+        # Write the private storage directly; it is called on the answer path.
+        self.__pydantic_private__["_json"] = None  # type: ignore[index]
+
+    def dump_json(self) -> bytes:
+        """
+        Returns the model encoded as JSON, serializing it only if it changed
+        since the last call.
+        """
+        stats = STATS.setdefault(type(self).__name__, SerializationStats())
+
+        if (payload := self._json) is not None:
+            stats.hits += 1
+            return payload
+
+        stats.misses += 1
+        payload = self._json = self.model_dump_json().encode()
+        return payload
@@ -0,0 +1,114 @@
+"""
+Represents an allocator of short, human-typeable room codes.
+"""
+
+import time
+from collections import deque
+from typing import Callable
+
+ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"
+"""
+The characters room codes are made of, leaving out 0, 1, I and O, which are
+easily confused when typed.
+"""
+
+_STRIDE = 0x9E3779B1
+"""
+An odd multiplier, which is coprime with every power-of-two code space, used
+to scramble consecutive counters into unrelated-looking codes.
+"""
+
+
+class RoomCodeAllocator:
+    """
+    Represents an allocator of short, human-typeable room codes. Codes are
+    issued in O(1) and are unique among live rooms. Released codes are only
+    reissued once they have been quarantined for a while, so stale links do
+    not lead into someone else's room.
+
+    Code i is a bijective scramble of counter i over the code space. Each
+    worker only uses the counters congruent to its worker ID modulo the
+    number of workers, so workers never issue the same code and never need to
+    coordinate.
+    """
+
+    def __init__(
+        self,
+        length: int = 5,
+        worker_id: int = 0,
+        workers: int = 1,
+        quarantine: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            length: The number of characters in a code.
+            worker_id: The ID of this worker, from 0 to workers - 1.
+            workers: The number of workers sharing the code space.
+            quarantine: The number of seconds before a released code can be
+                        reissued.
+            clock: The clock that measures the quarantine.
+
+        Raises:
+            ValueError: If the worker ID is not within [0, workers).
+        """
+        if not 0 <= worker_id < workers:
+            raise ValueError(f"Worker ID {worker_id} not within [0, {workers}).")
+
+        self.length = length
+        self.worker_id = worker_id
+        self.workers = workers
+        self.quarantine = quarantine
+        self.clock = clock
+
+        self.size = len(ALPHABET) ** length
+        self.live: set[str] = set()
+
+        self._counter = worker_id
+        self._released: deque[tuple[float, str]] = deque()
+
+    def allocate(self) -> str:
+        """
+        Issues a code that is not used by any live room.
+
+        Returns:
+            The issued code.
+
+        Raises:
+            RuntimeError: If every code of this worker is live or quarantined.
+        """
+        if self._released and self._released[0][0] <= self.clock():
+            code = self._released.popleft()[1]
+        elif self._counter < self.size:
+            code = self._encode(self._counter * _STRIDE % self.size)
+            self._counter += self.workers
+        else:
+            raise RuntimeError("No room codes available.")
+
+        self.live.add(code)
+        return code
+
+    def release(self, code: str) -> bool:
+        """
+        Returns a code to the allocator, to be reissued after the quarantine.
+
+        Args:
+            code: The code to release.
+
+        Returns:
+            True if the code was released, False if it was not live.
+        """
+        if code not in self.live:
+            return False
+
+        self.live.remove(code)
+        self._released.append((self.clock() + self.quarantine, code))
+        return True
+
+    def _encode(self, index: int) -> str:
+        chars = []
+        for _ in range(self.length):
+            index, digit = divmod(index, len(ALPHABET))
+            chars.append(ALPHABET[digit])
+
+        return "".join(chars)
@@ -0,0 +1,73 @@
+"""
+Represents a sequence of problems shared by every player in a match.
+"""
+
+from app.models.problem import Problem, ProblemSampler
+
+
+class ProblemDeck:
+    """
+    Represents a sequence of problems shared by every player in a match. The
+    deck is generated ahead of time in batches and topped up as the leading
+    player approaches its end, so each player only needs a cursor into it.
+
+    Problem i of the deck is determined by the seed alone, so the batches are
+    only a cache and can be recomputed anywhere with the sampler.
+
+    The deck is read on every correct answer, so it is a plain slotted class
+    rather than a model.
+    """
+
+    __slots__ = ("seed", "sampler", "batch_size", "low_water", "_problems")
+
+    def __init__(
+        self,
+        seed: int,
+        sampler: ProblemSampler,
+        batch_size: int = 256,
+        low_water: int = 64,
+    ) -> None:
+        self.seed = seed
+        self.sampler = sampler
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self._problems: list[Problem] = []
+
+    def __len__(self) -> int:
+        return len(self._problems)
+
+    def get(self, index: int) -> Problem:
+        """
+        Returns the problem at the given position in the deck, generating
+        more problems first if the deck is too short. Problems are the shared
+        table entries, so a lookup within the deck allocates nothing.
+
+        Args:
+            index: The position of the problem in the deck.
+        """
+        problems = self._problems
+        while index >= len(problems):
+            self._extend()
+
+        return problems[index]
+
+    def top_up(self, cursor: int) -> bool:
+        """
+        Generates another batch of problems if fewer than low_water problems
+        remain past the given cursor. Intended to run off the answer path.
+
+        Args:
+            cursor: The furthest position reached by any player.
+
+        Returns:
+            True if the deck was extended, False otherwise.
+        """
+        if len(self) - cursor >= self.low_water:
+            return False
+
+        self._extend()
+        return True
+
+    def _extend(self) -> None:
+        batch = self.sampler.batch(self.seed, len(self), self.batch_size)
+        self._problems.extend(batch.to_problems())
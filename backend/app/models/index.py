@@ -0,0 +1,168 @@
+"""
+Represents secondary indexes over the rooms of a manager.
+"""
+
+import heapq
+from typing import Iterator
+
+from app.models.room import Room, RoomStatus
+from sortedcontainers import SortedSet
+
+RoomKeys = tuple[RoomStatus, int, str, str | None]
+"""
+The indexed keys of a room: its status, player count, settings digest and
+host name.
+"""
+
+
+def player_bucket(count: int) -> int:
+    """
+    Returns the bucket of a player count. Bucket b holds the counts in
+    [2^(b - 1), 2^b), with bucket 0 holding only 0.
+    """
+    return count.bit_length()
+
+
+class RoomIndex:
+    """
+    Represents secondary indexes over rooms by status, player count bucket,
+    settings digest and host, kept up to date incrementally by the manager.
+    Rooms are indexed by their creation serial, and each index key keeps its
+    serials sorted, so a query walks its candidates in creation order from
+    the cursor and stops as soon as the page is full. Each update is
+    O(log n).
+    """
+
+    def __init__(self) -> None:
+        self.by_status: dict[RoomStatus, SortedSet] = {}
+        self.by_bucket: dict[int, SortedSet] = {}
+        self.by_digest: dict[str, SortedSet] = {}
+        self.by_host: dict[str, SortedSet] = {}
+        self.keys: dict[int, RoomKeys] = {}
+
+    def update(self, serial: int, room: Room) -> None:
+        """
+        Indexes a room under its current keys, replacing its previous keys.
+
+        Args:
+            serial: The creation serial of the room.
+            room: The room to index.
+        """
+        keys: RoomKeys = (
+            room.status,
+            len(room.players),
+            room.match_settings.digest,
+            room.host.name if room.host else None,
+        )
+        if self.keys.get(serial) == keys:
+            return
+
+        self.remove(serial)
+        self.keys[serial] = keys
+
+        status, count, digest, host = keys
+        self.by_status.setdefault(status, SortedSet()).add(serial)
+        self.by_bucket.setdefault(player_bucket(count), SortedSet()).add(serial)
+        self.by_digest.setdefault(digest, SortedSet()).add(serial)
+        if host is not None:
+            self.by_host.setdefault(host, SortedSet()).add(serial)
+
+    def remove(self, serial: int) -> None:
+        """
+        Removes a room from every index.
+
+        Args:
+            serial: The creation serial of the room to remove.
+        """
+        if (keys := self.keys.pop(serial, None)) is None:
+            return
+
+        status, count, digest, host = keys
+        _discard(self.by_status, status, serial)
+        _discard(self.by_bucket, player_bucket(count), serial)
+        _discard(self.by_digest, digest, serial)
+        if host is not None:
+            _discard(self.by_host, host, serial)
+
+    def query(
+        self,
+        cursor: int | None = None,
+        status: RoomStatus | None = None,
+        max_players: int | None = None,
+        settings_digest: str | None = None,
+        host: str | None = None,
+    ) -> Iterator[int] | None:
+        """
+        Returns the serials of the rooms that pass every given filter, in
+        creation order and starting after the given cursor. The serials are
+        produced lazily, so taking the first k costs O(log n + k) plus the
+        candidates rejected by the other filters along the way.
+
+        Args:
+            cursor: The serial to start after, or None to start from the
+                    first room.
+            status: Only keep rooms with this status.
+            max_players: Only keep rooms with at most this many players.
+            settings_digest: Only keep rooms whose settings have this digest.
+            host: Only keep rooms hosted by the player with this name.
+
+        Returns:
+            The serials of the matching rooms, or None if no filter was given.
+        """
+        exact = [
+            index.get(key, _EMPTY)
+            for index, key in (
+                (self.by_status, status),
+                (self.by_digest, settings_digest),
+                (self.by_host, host),
+            )
+            if key is not None
+        ]
+
+        if exact:
+            candidates = _after(min(exact, key=len), cursor)
+        elif max_players is not None:
+            candidates = heapq.merge(
+                *(
+                    _after(self.by_bucket.get(bucket, _EMPTY), cursor)
+                    for bucket in range(player_bucket(max_players) + 1)
+                )
+            )
+        else:
+            return None
+
+        return (
+            serial
+            for serial in candidates
+            if self._passes(serial, status, max_players, settings_digest, host)
+        )
+
+    def _passes(
+        self,
+        serial: int,
+        status: RoomStatus | None,
+        max_players: int | None,
+        settings_digest: str | None,
+        host: str | None,
+    ) -> bool:
+        room_status, count, digest, room_host = self.keys[serial]
+        return (
+            (status is None or room_status == status)
+            and (max_players is None or count <= max_players)
+            and (settings_digest is None or digest == settings_digest)
+            and (host is None or room_host == host)
+        )
+
+
+_EMPTY = SortedSet()
+
+
+def _after(serials: SortedSet, cursor: int | None) -> Iterator[int]:
+    return serials.irange(minimum=cursor, inclusive=(False, True))
+
+
+def _discard(index: dict, key: object, serial: int) -> None:
+    if serials := index.get(key):
+        serials.discard(serial)
+        if not serials:
+            del index[key]
@@ -0,0 +1,117 @@
+"""
+Represents the live ranking of the players in a match.
+"""
+
+from app.models.player import Player
+from pydantic import BaseModel
+from sortedcontainers import SortedList
+
+
+class Standing(BaseModel):
+    """
+    Represents a player's position in a leaderboard, with rank 1 being the
+    leader.
+    """
+
+    rank: int
+    name: str
+    score: int
+
+
+class Leaderboard:
+    """
+    Represents the ranking of the players in a match by score, highest first.
+    Ties are broken by slot, so players who joined earlier rank higher. The
+    ranking is updated in O(log n) on each score change, and rank and range
+    queries cost O(log n + k).
+
+    It is updated on the answer hot path, so it is a plain slotted class
+    rather than a model.
+    """
+
+    __slots__ = ("players", "slot_of", "_ranking")
+
+    def __init__(self, players: list[Player]) -> None:
+        """
+        Args:
+            players: The players by slot, ranked by their current scores.
+        """
+        self.players = players
+        self.slot_of = {player.name: slot for slot, player in enumerate(players)}
+        self._ranking = SortedList(
+            (-player.score, slot) for slot, player in enumerate(players)
+        )
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    def update(self, slot: int, old_score: int) -> None:
+        """
+        Moves the player in the given slot to the position of their current
+        score.
+
+        Args:
+            slot: The player's slot.
+            old_score: The score the player was ranked by until now.
+        """
+        ranking = self._ranking
+        ranking.remove((-old_score, slot))
+        ranking.add((-self.players[slot].score, slot))
+
+    @property
+    def leader(self) -> Player | None:
+        """
+        The highest ranked player, or None if there are no players.
+        """
+        if not self._ranking:
+            return None
+
+        return self.players[self._ranking[0][1]]
+
+    def rank_of(self, name: str) -> int | None:
+        """
+        Returns the rank of the player with the given name, starting from 1,
+        or None if the player is not ranked.
+
+        Args:
+            name: The name of the player.
+        """
+        if (slot := self.slot_of.get(name)) is None:
+            return None
+
+        return self._ranking.index((-self.players[slot].score, slot)) + 1
+
+    def top(self, k: int) -> list[Standing]:
+        """
+        Returns the standings of the k highest ranked players.
+
+        Args:
+            k: The number of players to return.
+        """
+        return self._standings(0, k)
+
+    def neighbors(self, name: str, k: int = 1) -> list[Standing]:
+        """
+        Returns the standings of the player with the given name and of up to
+        k players ranked directly above and below them.
+
+        Args:
+            name: The name of the player.
+            k: The number of players to return on each side.
+
+        Returns:
+            The standings in rank order, or an empty list if the player is not
+            ranked.
+        """
+        if (rank := self.rank_of(name)) is None:
+            return []
+
+        return self._standings(max(rank - 1 - k, 0), rank + k)
+
+    def _standings(self, start: int, stop: int) -> list[Standing]:
+        return [
+            Standing(rank=rank, name=self.players[slot].name, score=-score)
+            for rank, (score, slot) in enumerate(
+                self._ranking.islice(start, stop), start + 1
+            )
+        ]
@@ -2,18 +2,57 @@
 Represents a manager that handles game rooms and player interactions.
 """
 
-from app.models.match import MatchSettings
+from itertools import islice
+
+from app.models.codes import RoomCodeAllocator
+from app.models.index import RoomIndex
+from app.models.match import Match, MatchSettings
 from app.models.player import Player
-from app.models.room import Room
-from pydantic import BaseModel
+from app.models.room import Room, RoomStatus
+from pydantic import BaseModel, PrivateAttr
+from sortedcontainers import SortedDict
 
 
 class Manager(BaseModel):
     """
-    Represents a manager that handles game rooms and player interactions.
+    Represents a manager that handles game rooms and player interactions. The
+    version increases whenever a room is created or deleted or changes in a
+    way the lobby shows. A player can be in at most one room at a time, and
+    the presence index finds that room in O(1).
+
+    When several workers serve the same lobby, each one owns the room codes
+    of its partition, given by worker_id and workers, so their codes never
+    collide.
     """
 
     rooms: dict[str, Room] = {}
+    version: int = 0
+    worker_id: int = 0
+    workers: int = 1
+
+    _codes: RoomCodeAllocator = PrivateAttr()
+    _serial: int = PrivateAttr(default=0)
+    _order: SortedDict = PrivateAttr(default_factory=SortedDict)
+    _serial_of: dict[str, int] = PrivateAttr(default_factory=dict)
+    _index: RoomIndex = PrivateAttr(default_factory=RoomIndex)
+    _presence: dict[str, str] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: object) -> None:
+        """
+        Builds the room code allocator for this worker's partition.
+
+        Raises:
+            ValueError: If the worker ID is not within [0, workers).
+        """
+        self._codes = RoomCodeAllocator(worker_id=self.worker_id, workers=self.workers)
+
+    def _changed(self, room: Room) -> None:
+        """
+        Records a lobby-visible change to a room: bumps the lobby version and
+        reindexes the room.
+        """
+        self.version += 1
+        self._index.update(self._serial_of[room.id], room)
 
     def get_room(self, room_id: str) -> Room | None:
         """
@@ -24,13 +63,72 @@ class Manager(BaseModel):
         """
         return self.rooms.get(room_id)
 
+    def serial_of(self, room_id: str) -> int | None:
+        """
+        Returns the creation serial of the room with the given ID, or None if
+        it does not exist. Serials are never reused, so they tell apart rooms
+        that were given the same code at different times.
+
+        Args:
+            room_id: The ID of the room.
+        """
+        return self._serial_of.get(room_id)
+
     def get_rooms(self) -> list[Room]:
         """
         Returns a list of all active rooms.
         """
         return list(self.rooms.values())
 
-    def create_room(self, host: Player) -> str:
+    def list_rooms(
+        self,
+        cursor: int | None = None,
+        limit: int = 50,
+        status: RoomStatus | None = None,
+        max_players: int | None = None,
+        settings_digest: str | None = None,
+        host: str | None = None,
+    ) -> tuple[list[Room], int | None]:
+        """
+        Returns one page of rooms in creation order, starting after the given
+        cursor and keeping only rooms that pass the given filters. Unfiltered
+        pages cost O(log n + limit); filtered pages walk the most selective
+        secondary index from the cursor and stop once the page is full.
+
+        Args:
+            cursor: The cursor returned with the previous page, or None to
+                    start from the first room.
+            limit: The maximum number of rooms in the page.
+            status: Only keep rooms with this status.
+            max_players: Only keep rooms with at most this many players.
+            settings_digest: Only keep rooms whose settings have this digest.
+            host: Only keep rooms hosted by the player with this name.
+
+        Returns:
+            The rooms in the page, and the cursor for the next page or None if
+            there are no more rooms.
+        """
+        serials = self._index.query(cursor, status, max_players, settings_digest, host)
+        if serials is None:
+            serials = self._order.irange(minimum=cursor, inclusive=(False, True))
+
+        page = list(islice(serials, limit + 1))
+
+        rooms = [self.rooms[self._order[serial]] for serial in page[:limit]]
+        next_cursor = page[limit - 1] if len(page) > limit else None
+        return rooms, next_cursor
+
+    def locate(self, name: str) -> str | None:
+        """
+        Returns the ID of the room the player with the given name is in, or
+        None if they are not in any room.
+
+        Args:
+            name: The name of the player to locate.
+        """
+        return self._presence.get(name)
+
+    def create_room(self, host: Player) -> str | None:
         """
         Creates a new room with the given player as the host.
 
@@ -39,10 +137,20 @@ class Manager(BaseModel):
 
         Returns:
             The ID of the newly created room with the given host and default
-            settings.
+            settings, a short code unique among live rooms, or None if the
+            host is already in a room.
         """
-        room_id = str(len(self.rooms) + 1)  # TODO: generate unique ID
+        if host.name in self._presence:
+            return None
+
+        room_id = self._codes.allocate()
+        self._presence[host.name] = room_id
         self.rooms[room_id] = Room(id=room_id, host=host, players={host.name: host})
+
+        self._serial += 1
+        self._order[self._serial] = room_id
+        self._serial_of[room_id] = self._serial
+        self._changed(self.rooms[room_id])
         return room_id
 
     def delete_room(self, room_id: str) -> bool:
@@ -56,7 +164,19 @@ class Manager(BaseModel):
             True if the room was deleted successfully, False if the room does
             not exist.
         """
-        return self.rooms.pop(room_id, None) is not None
+        if (room := self.rooms.pop(room_id, None)) is None:
+            return False
+
+        for name in room.players:
+            if self._presence.get(name) == room_id:
+                del self._presence[name]
+
+        serial = self._serial_of.pop(room_id)
+        del self._order[serial]
+        self._index.remove(serial)
+        self._codes.release(room_id)
+        self.version += 1
+        return True
 
     def add_player(self, room_id: str, player: Player) -> bool:
         """
@@ -68,10 +188,15 @@ class Manager(BaseModel):
 
         Returns:
             True if the player was added successfully, False if the room does
-            not exist or the player could not be added.
+            not exist or the player is already in a room.
         """
+        if player.name in self._presence:
+            return False
+
         if room := self.get_room(room_id):
             if room.add_player(player):
+                self._presence[player.name] = room_id
+                self._changed(room)
                 return True
 
         return False
@@ -91,6 +216,8 @@ class Manager(BaseModel):
         """
         if room := self.get_room(room_id):
             if room.remove_player(player):
+                self._presence.pop(player.name, None)
+                self._changed(room)
                 if not room.players:
                     self.delete_room(room_id)
                 return True
@@ -111,6 +238,7 @@ class Manager(BaseModel):
         """
         if room := self.get_room(room_id):
             room.update_settings(settings)
+            self._changed(room)
             return True
 
         return False
@@ -127,7 +255,9 @@ class Manager(BaseModel):
             not exist or the match could not be started.
         """
         if room := self.get_room(room_id):
-            return room.start_match()
+            if room.start_match():
+                self._changed(room)
+                return True
         return False
 
     def end_match(self, room_id: str) -> bool:
@@ -142,7 +272,9 @@ class Manager(BaseModel):
             not exist or the match could not be ended.
         """
         if room := self.get_room(room_id):
-            return room.end_match()
+            if room.end_match():
+                self._changed(room)
+                return True
         return False
 
     def handle_answer(self, room_id: str, player: Player, answer: int) -> bool | None:
@@ -160,6 +292,48 @@ class Manager(BaseModel):
         """
         if room := self.get_room(room_id):
             if match := room.current_match:
-                return match.handle_answer(player, answer)
+                verdict = match.handle_answer(player, answer)
+                if verdict:
+                    room.touch()
+                return verdict
+
+        return None
+
+    def resolve_slot(self, room_id: str, name: str) -> tuple[Match, int] | None:
+        """
+        Resolves a player to a handle for Match.answer_slot, so repeated
+        answers skip the room and player lookups. The handle is only valid
+        while the match is the room's current match.
+
+        Args:
+            room_id: The ID of the room the player is in.
+            name: The name of the player.
+
+        Returns:
+            The room's current match and the player's slot in it, or None if
+            the room/match/player does not exist.
+        """
+        if room := self.get_room(room_id):
+            if match := room.current_match:
+                if (slot := match.slot_of(name)) is not None:
+                    return match, slot
 
         return None
+
+    def top_up(self, room_id: str) -> bool:
+        """
+        Extends the problem deck of the match in the room with the given ID if
+        its leading player is close to the end.
+
+        Args:
+            room_id: The ID of the room whose match to top up.
+
+        Returns:
+            True if the deck was extended, False if it was not or the
+            room/match does not exist.
+        """
+        if room := self.get_room(room_id):
+            if match := room.current_match:
+                return match.top_up()
+
+        return False
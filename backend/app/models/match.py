@@ -2,77 +2,187 @@
 Represents matches that occur in a room.
 """
 
-import random
+import hashlib
+from functools import cached_property, lru_cache
+from typing import NamedTuple
 
+from app.models.deck import ProblemDeck
+from app.models.leaderboard import Leaderboard
 from app.models.player import Player
-from app.models.problem import OpBounds, Operation, Problem
-from pydantic import BaseModel
+from app.models.problem import OpBounds, Operation, Problem, ProblemSampler, new_seed
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 
 
 class MatchSettings(BaseModel):
     """
     Represents the settings for a match, with allowed operations,
     addition/subtraction bounds, multiplication/division bounds, and a
-    duration in seconds.
+    duration in seconds. Settings are immutable and hashable so matches with
+    equal settings can share a compiled sampler, and they are compiled when
+    they are created so invalid settings are rejected before any match uses
+    them.
     """
 
-    operations: list[Operation] = list(Operation)
+    model_config = ConfigDict(frozen=True)
+
+    operations: tuple[Operation, ...] = tuple(Operation)
     add_bounds: OpBounds = OpBounds(bounds_1=(2, 100), bounds_2=(2, 100))
     mul_bounds: OpBounds = OpBounds(bounds_1=(2, 12), bounds_2=(2, 100))
     duration: int = 120
 
+    @model_validator(mode="after")
+    def _compile(self) -> "MatchSettings":
+        """
+        Raises:
+            ValueError: If the operations list is empty, or the bounds of an
+                        operation in the list are invalid.
+        """
+        get_sampler(self)
+        return self
+
+    @cached_property
+    def digest(self) -> str:
+        """
+        A short fingerprint of the settings, equal for equal settings.
+        """
+        return hashlib.blake2b(
+            self.model_dump_json().encode(), digest_size=6
+        ).hexdigest()
+
+
+@lru_cache(maxsize=1024)
+def get_sampler(settings: MatchSettings) -> ProblemSampler:
+    """
+    Returns the compiled sampler for the given settings from a process-wide
+    LRU cache, so equal settings are compiled and validated only once.
+
+    Args:
+        settings: The settings to compile.
+
+    Raises:
+        ValueError: If the operations list is empty, or the bounds of an
+                    operation in the list are invalid.
+    """
+    return ProblemSampler(settings.operations, settings.add_bounds, settings.mul_bounds)
+
+
+class SamplerCacheInfo(NamedTuple):
+    """
+    Represents the hit/miss counters and size of the sampler cache.
+    """
+
+    hits: int
+    misses: int
+    maxsize: int | None
+    currsize: int
+
+
+def sampler_cache_info() -> SamplerCacheInfo:
+    """
+    Returns the hit/miss counters and size of the sampler cache.
+    """
+    return SamplerCacheInfo(*get_sampler.cache_info())
+
 
 class MatchResult(BaseModel):
     """
     Represents the result of a match, including the winner and final scores.
 
     Final scores are captured in a dictionary mapping player names to their
-    score.
+    score. A match that ended without players has no winner.
     """
 
-    winner: Player
+    winner: Player | None = None
     final_scores: dict[str, int] = {}
 
 
+class MatchState:
+    """
+    Represents the state of a started match that the answer hot path touches:
+    the problem deck, the players by slot, their live ranking and the
+    furthest cursor reached.
+    It is a plain slotted class because private attribute access on models is
+    too slow for this path.
+    """
+
+    __slots__ = ("deck", "players", "slot_of", "leaderboard", "lead")
+
+    def __init__(self, deck: ProblemDeck, players: list[Player]) -> None:
+        self.deck = deck
+        self.players = players
+        self.leaderboard = Leaderboard(players)
+        self.slot_of = self.leaderboard.slot_of
+        self.lead = 0
+
+    def answer(self, slot: int, answer: int) -> bool:
+        """
+        Handles an answer from the player in the given slot, advancing the
+        player to the next problem in the deck and reranking them if the
+        answer is correct. It does no lookups by name, and the rerank is the
+        only step that is not O(1).
+
+        Args:
+            slot: The player's slot.
+            answer: The answer submitted by the player.
+
+        Returns:
+            True if the answer was correct, False otherwise.
+        """
+        player = self.players[slot]
+        problem = player.current_problem
+        if problem is None or answer != problem.result:
+            return False
+
+        cursor = player.cursor + 1
+        score = player.score
+        player.score = score + 1
+        player.cursor = cursor
+        self.leaderboard.update(slot, score)
+        if cursor > self.lead:
+            self.lead = cursor
+        player.current_problem = self.deck.get(cursor)
+        return True
+
+
 class Match(BaseModel):
     """
-    Represents a match that occurs in a room.
+    Represents a match that occurs in a room. Every problem in the match is
+    derived from its seed, so a player's current problem can be recomputed
+    from the seed and the player's cursor alone. The seed is left out of the
+    match's JSON, since it would let clients compute every future problem.
     """
 
     players: dict[str, Player] = {}
     settings: MatchSettings = MatchSettings()
+    seed: int = Field(default_factory=new_seed, exclude=True)
     active: bool = False
     result: MatchResult | None = None
 
-    def _generate_problem(self) -> Problem:
-        """
-        Generates a new problem based on the current settings.
-        """
-        return Problem.generate(
-            random.choice(self.settings.operations),
-            self.settings.add_bounds,
-            self.settings.mul_bounds,
-        )
+    _state: MatchState | None = PrivateAttr(default=None)
 
     def start_match(self) -> None:
         """
-        Starts the match and assigns a new problem to each player.
+        Starts the match, generates the problem deck shared by all players,
+        and assigns the first problem in the deck to each player.
 
         Raises:
-            ValueError: If the operations list is empty.
+            ValueError: If the operations list is empty or the bounds are
+                        invalid.
         """
-        if not self.settings.operations:
-            raise ValueError("No operations available to generate problems.")
-
+        deck = ProblemDeck(seed=self.seed, sampler=get_sampler(self.settings))
+        self._state = MatchState(deck, list(self.players.values()))
         self.active = True
 
-        for player in self.players.values():
-            player.assign_problem(self._generate_problem())
+        first = deck.get(0)
+        for player in self._state.players:
+            player.cursor = 0
+            player.assign_problem(first)
 
     def end_match(self) -> None:
         """
         Ends the match, clears each player's problem, and updates the match
-        result.
+        result. The winner is read from the live leaderboard, and is None if
+        the match has no players.
         """
         self.active = False
 
@@ -80,16 +190,88 @@ class Match(BaseModel):
             player.clear_problem()
 
         self.result = MatchResult(
-            winner=max(self.players.values(), key=lambda p: p.score),
+            winner=self.leaderboard.leader,
             final_scores={
                 player.name: player.score for player in self.players.values()
             },
         )
 
+    def problem_at(self, cursor: int) -> Problem:
+        """
+        Recomputes the problem at the given cursor from the match seed,
+        without consulting the deck.
+
+        Args:
+            cursor: The position of the problem in the match's sequence.
+        """
+        return get_sampler(self.settings).at(self.seed, cursor)
+
+    def top_up(self) -> bool:
+        """
+        Extends the problem deck if the leading player is close to its end.
+        Intended to run in the background after answers are handled.
+
+        Returns:
+            True if the deck was extended, False otherwise.
+        """
+        if (state := self._state) is None:
+            return False
+
+        return state.deck.top_up(state.lead)
+
+    @property
+    def leaderboard(self) -> Leaderboard:
+        """
+        The live ranking of the players, maintained incrementally while the
+        match is running. Before the match starts, it is built from the
+        players' current scores.
+        """
+        if (state := self._state) is None:
+            return Leaderboard(list(self.players.values()))
+
+        return state.leaderboard
+
+    @property
+    def state(self) -> MatchState | None:
+        """
+        The hot path state of the match, or None if it has not started.
+        """
+        return self._state
+
+    def slot_of(self, name: str) -> int | None:
+        """
+        Returns the slot of the player with the given name, a handle for
+        answer_slot that stays valid for the rest of the match, or None if
+        the player is not in the started match.
+
+        Args:
+            name: The name of the player.
+        """
+        if (state := self._state) is None:
+            return None
+
+        return state.slot_of.get(name)
+
+    def answer_slot(self, slot: int, answer: int) -> bool:
+        """
+        Handles an answer from the player in the given slot, advancing the
+        player to the next problem in the deck if the answer is correct. See
+        MatchState.answer, which callers holding the state can use directly.
+
+        Args:
+            slot: The player's slot, as returned by slot_of.
+            answer: The answer submitted by the player.
+
+        Returns:
+            True if the answer was correct, False otherwise.
+        """
+        return self._state.answer(slot, answer)  # type: ignore[union-attr]
+
     def handle_answer(self, player: Player, answer: int) -> bool | None:
         """
         Handles a player's answer to a question in the match by checking the
-        answer and assigning a new problem if the answer is correct.
+        answer and advancing the player to the next problem in the deck if
+        the answer is correct.
 
         Args:
             player: The player submitting the answer.
@@ -99,12 +281,10 @@ class Match(BaseModel):
             True if the answer was correct, False if the answer was incorrect
             or None if the player does not exist.
         """
-        if player.name in self.players:
-            match_player = self.players[player.name]
-            if match_player.check(answer):
-                match_player.assign_problem(self._generate_problem())
-                return True
+        if (slot := self.slot_of(player.name)) is not None:
+            return self.answer_slot(slot, answer)
 
-            return False
+        if player.name in self.players:
+            return self.players[player.name].check(answer)
 
         return None
@@ -0,0 +1,228 @@
+"""
+Represents the quick-join matchmaking queue.
+"""
+
+import time
+from collections import deque
+from typing import Callable
+
+from app.models.manager import Manager
+from app.models.match import MatchSettings
+from app.models.player import Player
+from pydantic import BaseModel
+
+
+class QuickJoinResult(BaseModel):
+    """
+    Represents the outcome of a quick-join request: the room the player was
+    placed in, or None if they are queued until enough players are waiting.
+    """
+
+    room_id: str | None = None
+    queued: bool = False
+
+
+class MatchmakingStats(BaseModel):
+    """
+    Represents the state of the matchmaking queue, with wait times in seconds
+    over the most recently matched players.
+    """
+
+    depth: int
+    groups: int
+    matched: int
+    mean_wait: float
+    max_wait: float
+    oldest_wait: float
+
+
+class Ticket:
+    """
+    Represents a player waiting in the queue. Tickets of players who leave
+    are marked cancelled and skipped when they reach the front.
+    """
+
+    __slots__ = ("name", "settings", "enqueued_at", "cancelled")
+
+    def __init__(self, name: str, settings: MatchSettings, enqueued_at: float) -> None:
+        self.name = name
+        self.settings = settings
+        self.enqueued_at = enqueued_at
+        self.cancelled = False
+
+
+class Matchmaker:
+    """
+    Represents the quick-join matchmaking queue. Waiting players are grouped
+    by their match settings. Once a group has start_threshold players, a room
+    is created through the manager and filled with up to room_size of them,
+    oldest first, and its match is started.
+
+    Joining and leaving are O(1) however many players are waiting. Rooms are
+    formed synchronously, without going through the room actors, which is
+    safe because a new room has no queued mutations to order against.
+    """
+
+    def __init__(
+        self,
+        manager: Manager,
+        start_threshold: int = 2,
+        room_size: int = 8,
+        history: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            manager: The manager to create rooms through.
+            start_threshold: The number of waiting players that starts a match.
+            room_size: The maximum number of players placed in one room.
+            history: The number of recent wait times kept for the statistics.
+            clock: The clock that measures wait times.
+
+        Raises:
+            ValueError: If the threshold is not within [1, room_size].
+        """
+        if not 1 <= start_threshold <= room_size:
+            raise ValueError("Start threshold must be within [1, room_size].")
+
+        self.manager = manager
+        self.start_threshold = start_threshold
+        self.room_size = room_size
+        self.clock = clock
+
+        self.groups: dict[MatchSettings, deque[Ticket]] = {}
+        self.sizes: dict[MatchSettings, int] = {}
+        self.waiting: dict[str, Ticket] = {}
+
+        self.matched = 0
+        self.waits: deque[float] = deque(maxlen=history)
+
+    def join(self, player: Player, settings: MatchSettings) -> QuickJoinResult | None:
+        """
+        Queues a player for a match with the given settings, and starts a
+        match if that brings their group to the threshold.
+
+        Args:
+            player: The player to queue.
+            settings: The match settings the player wants.
+
+        Returns:
+            The room the player was placed in, or a queued result if they are
+            waiting. None if the player is already in a room.
+        """
+        if self.manager.locate(player.name) is not None:
+            return None
+
+        if (ticket := self.waiting.get(player.name)) is not None:
+            if ticket.settings == settings:
+                return QuickJoinResult(queued=True)
+            self.leave(player.name)
+
+        ticket = Ticket(player.name, settings, self.clock())
+        self.waiting[player.name] = ticket
+        self.groups.setdefault(settings, deque()).append(ticket)
+        self.sizes[settings] = self.sizes.get(settings, 0) + 1
+
+        if self.sizes[settings] >= self.start_threshold:
+            self._form_room(settings)
+
+        if room_id := self.manager.locate(player.name):
+            return QuickJoinResult(room_id=room_id)
+
+        return QuickJoinResult(queued=True)
+
+    def leave(self, name: str) -> bool:
+        """
+        Removes a player from the queue.
+
+        Args:
+            name: The name of the player to remove.
+
+        Returns:
+            True if the player was removed, False if they were not queued.
+        """
+        if (ticket := self.waiting.pop(name, None)) is None:
+            return False
+
+        ticket.cancelled = True
+        self._shrink(ticket.settings)
+        return True
+
+    def stats(self) -> MatchmakingStats:
+        """
+        Returns the depth of the queue and recent wait times.
+        """
+        now = self.clock()
+        oldest = max(
+            (now - self._head(group).enqueued_at for group in self.groups.values()),
+            default=0.0,
+        )
+
+        return MatchmakingStats(
+            depth=len(self.waiting),
+            groups=len(self.groups),
+            matched=self.matched,
+            mean_wait=sum(self.waits) / len(self.waits) if self.waits else 0.0,
+            max_wait=max(self.waits, default=0.0),
+            oldest_wait=oldest,
+        )
+
+    def _form_room(self, settings: MatchSettings) -> None:
+        """
+        Creates a room for the oldest players waiting with the given settings
+        and starts its match.
+        """
+        group = self.groups[settings]
+        now = self.clock()
+        tickets: list[Ticket] = []
+
+        while group and len(tickets) < self.room_size:
+            ticket = self._pop(settings)
+            if ticket is None:
+                break
+
+            # Players who joined a room by other means since queueing are
+            # dropped rather than matched.
+            if self.manager.locate(ticket.name) is None:
+                tickets.append(ticket)
+
+        if len(tickets) < self.start_threshold:
+            for ticket in reversed(tickets):
+                self._requeue(ticket)
+            return
+
+        room_id = self.manager.create_room(Player(name=tickets[0].name))
+        assert room_id is not None
+        for ticket in tickets[1:]:
+            self.manager.add_player(room_id, Player(name=ticket.name))
+        self.manager.update_settings(room_id, settings)
+        self.manager.start_match(room_id)
+
+        self.matched += len(tickets)
+        self.waits.extend(now - ticket.enqueued_at for ticket in tickets)
+
+    def _head(self, group: deque[Ticket]) -> Ticket:
+        while group[0].cancelled:
+            group.popleft()
+        return group[0]
+
+    def _pop(self, settings: MatchSettings) -> Ticket | None:
+        group = self.groups[settings]
+        while group:
+            ticket = group.popleft()
+            if not ticket.cancelled:
+                del self.waiting[ticket.name]
+                self._shrink(settings)
+                return ticket
+        return None
+
+    def _requeue(self, ticket: Ticket) -> None:
+        self.waiting[ticket.name] = ticket
+        self.groups.setdefault(ticket.settings, deque()).appendleft(ticket)
+        self.sizes[ticket.settings] = self.sizes.get(ticket.settings, 0) + 1
+
+    def _shrink(self, settings: MatchSettings) -> None:
+        self.sizes[settings] -= 1
+        if not self.sizes[settings]:
+            del self.sizes[settings]
+            del self.groups[settings]
@@ -8,11 +8,13 @@ from pydantic import BaseModel
 
 class Player(BaseModel):
     """
-    Represents a player in a match.
+    Represents a player in a match. The cursor is the player's position in
+    the match's problem deck.
     """
 
     name: str
     score: int = 0
+    cursor: int = 0
     current_problem: Problem | None = None
 
     def __str__(self) -> str:
@@ -1,11 +1,19 @@
 """
 Represents binary arithmetic problems with two operands and an operation.
+
+Problems are drawn from counter-based sequences: problem i of a sequence is a
+pure function of the sequence's seed and i, so any process can recompute it
+without shared random state or stored problems. Drawing a problem picks an
+index into the ProblemTable of its operation and bounds, whose entries are
+shared, immutable Problem instances.
 """
 
-import random
+import secrets
 from enum import StrEnum
+from functools import lru_cache
 
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, ConfigDict
 
 
 class Operation(StrEnum):
@@ -21,9 +29,12 @@ class Operation(StrEnum):
 
 class OpBounds(BaseModel):
     """
-    Represents a pair of [lower, upper] bounds for the two operands.
+    Represents a pair of [lower, upper] bounds for the two operands. Bounds
+    are immutable and hashable so they can key shared tables and samplers.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     bounds_1: tuple[int, int]
     bounds_2: tuple[int, int]
 
@@ -31,12 +42,28 @@ class OpBounds(BaseModel):
         return f"{{{self.bounds_1} x {self.bounds_2}}}"
 
 
+OPERATIONS: tuple[Operation, ...] = tuple(Operation)
+"""
+All operations in a fixed order. Batches store operations as indices into this
+tuple.
+"""
+
+
+def new_seed() -> int:
+    """
+    Returns a fresh 64-bit seed for a problem sequence.
+    """
+    return secrets.randbits(64)
+
+
 class Problem(BaseModel):
     """
     Represents a binary arithmetic problem with two operands, an operation,
-    and the result.
+    and the result. Problems are immutable so table entries can be shared.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     num1: int
     num2: int
     operation: Operation
@@ -46,10 +73,17 @@ class Problem(BaseModel):
         return f"{self.num1} {self.operation.value} {self.num2} = {self.result}"
 
     @classmethod
-    def generate(cls, operation: Operation, add_bounds: OpBounds, mul_bounds: OpBounds):
+    def generate(
+        cls,
+        operation: Operation,
+        add_bounds: OpBounds,
+        mul_bounds: OpBounds,
+        seed: int | None = None,
+        index: int = 0,
+    ):
         """
-        Generates a problem with the given operation and randomly chosen
-        operands within the given bounds.
+        Generates a problem with the given operation and operands chosen
+        within the given bounds from the sequence with the given seed.
 
         Args:
             operation: The arithmetic operation to perform.
@@ -57,6 +91,8 @@ class Problem(BaseModel):
                         addition/subtraction.
             mul_bounds: The bounds within which to generate operands for
                         multiplication/division.
+            seed: The seed of the sequence, or None to use a fresh one.
+            index: The position of the problem in the sequence.
 
         Returns:
             A Problem instance with the generated operands and operation.
@@ -65,62 +101,391 @@ class Problem(BaseModel):
             ValueError: If the bounds are invalid (i.e. lower > greater) or
                         equal to 0 for the divisor.
         """
-        if operation == Operation.ADD:
-            return cls._generate_add(add_bounds)
-        if operation == Operation.SUB:
-            return cls._generate_sub(add_bounds)
-        if operation == Operation.MUL:
-            return cls._generate_mul(mul_bounds)
+        if seed is None:
+            seed = new_seed()
 
-        return cls._generate_div(mul_bounds)
+        table = problem_table(operation, add_bounds, mul_bounds)
+        return table[_word(seed, index, _LANE_INDEX) % table.size]
 
     @classmethod
-    def _generate_add(cls, bounds: OpBounds):
-        a = random.randint(*bounds.bounds_1)
-        b = random.randint(*bounds.bounds_2)
-
-        return cls(
-            num1=a,
-            num2=b,
-            operation=Operation.ADD,
-            result=a + b,
-        )
+    def at(
+        cls,
+        seed: int,
+        index: int,
+        operations: tuple[Operation, ...] | list[Operation],
+        add_bounds: OpBounds,
+        mul_bounds: OpBounds,
+    ):
+        """
+        Returns problem i of the sequence with the given seed, with the
+        operation chosen uniformly from the given operations. Runs in O(1)
+        and agrees with generate_batch.
 
-    @classmethod
-    def _generate_sub(cls, bounds: OpBounds):
-        add_problem = cls._generate_add(bounds)
-
-        return cls(
-            num1=add_problem.result,
-            num2=add_problem.num1,
-            operation=Operation.SUB,
-            result=add_problem.num2,
-        )
+        Args:
+            seed: The seed of the sequence.
+            index: The position of the problem in the sequence.
+            operations: The arithmetic operations to choose from.
+            add_bounds: The bounds within which to generate operands for
+                        addition/subtraction.
+            mul_bounds: The bounds within which to generate operands for
+                        multiplication/division.
+
+        Raises:
+            ValueError: If the operations list is empty, or the bounds are
+                        invalid (i.e. lower > greater) or equal to 0 for the
+                        divisor.
+        """
+        return ProblemSampler(operations, add_bounds, mul_bounds).at(seed, index)
 
     @classmethod
-    def _generate_mul(cls, bounds: OpBounds):
-        a = random.randint(*bounds.bounds_1)
-        b = random.randint(*bounds.bounds_2)
-
-        return cls(
-            num1=a,
-            num2=b,
-            operation=Operation.MUL,
-            result=a * b,
+    def generate_batch(
+        cls,
+        n: int,
+        operations: tuple[Operation, ...] | list[Operation],
+        add_bounds: OpBounds,
+        mul_bounds: OpBounds,
+        seed: int | None = None,
+        start: int = 0,
+    ) -> "ProblemBatch":
+        """
+        Generates problems start..start + n - 1 of the sequence with the given
+        seed at once as NumPy arrays, with each operation chosen uniformly
+        from the given operations and operands chosen within the given
+        bounds. Problem models are only created when requested from the
+        returned batch.
+
+        Args:
+            n: The number of problems to generate.
+            operations: The arithmetic operations to choose from.
+            add_bounds: The bounds within which to generate operands for
+                        addition/subtraction.
+            mul_bounds: The bounds within which to generate operands for
+                        multiplication/division.
+            seed: The seed of the sequence, or None to use a fresh one.
+            start: The position of the first problem in the sequence.
+
+        Returns:
+            A ProblemBatch holding the generated problems column-wise.
+
+        Raises:
+            ValueError: If the operations list is empty, or the bounds of an
+                        operation in the list are invalid (i.e. lower >
+                        greater) or equal to 0 for the divisor.
+        """
+        if seed is None:
+            seed = new_seed()
+
+        sampler = ProblemSampler(operations, add_bounds, mul_bounds)
+        return sampler.batch(seed, start, n)
+
+
+class ProblemTable:
+    """
+    Represents the whole space of problems for one operation and pair of
+    bounds, indexed from 0 to size - 1. Operands are computed from the index
+    arithmetically, and Problem instances are interned so every lookup of an
+    index returns the same shared object.
+
+    Subtraction and division problems are the inverses of addition and
+    multiplication problems, so results stay within the bounds. Zero is left
+    out of the divisor range, so every index is a valid problem.
+    """
+
+    MAX_INTERNED = 1 << 16
+    """
+    The largest table whose entries are interned. Entries of larger tables are
+    created on each lookup.
+    """
+
+    def __init__(self, operation: Operation, bounds: OpBounds) -> None:
+        """
+        Raises:
+            ValueError: If the bounds are invalid (i.e. lower > greater),
+                        equal to 0 for the divisor, or so large that the
+                        table size, operands or results do not fit in int64.
+        """
+        if operation == Operation.DIV:
+            _check_divisor_bounds(bounds.bounds_1)
+        else:
+            _check_bounds(bounds.bounds_1)
+        _check_bounds(bounds.bounds_2)
+
+        self.operation = operation
+        self.lower_1, upper_1 = bounds.bounds_1
+        self.lower_2, upper_2 = bounds.bounds_2
+        self.skip_zero = operation == Operation.DIV and self.lower_1 <= 0 <= upper_1
+
+        self.width = upper_2 - self.lower_2 + 1
+        self.size = (upper_1 - self.lower_1 + 1 - self.skip_zero) * self.width
+
+        # The batch path computes the columns in int64, which would wrap
+        # silently, so tables it cannot represent are rejected up front.
+        corners = [
+            x * y if operation in (Operation.MUL, Operation.DIV) else x + y
+            for x in bounds.bounds_1
+            for y in bounds.bounds_2
+        ]
+        if not (
+            self.size <= _INT64_MAX
+            and _INT64_MIN <= min(*corners, self.lower_1, self.lower_2)
+            and max(*corners, upper_1, upper_2) <= _INT64_MAX
+        ):
+            raise ValueError(f"Bounds {bounds} exceed the int64 range.")
+
+        self._problems: list[Problem | None] | None = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> Problem:
+        if self.size > self.MAX_INTERNED:
+            return self._build(index)
+
+        if self._problems is None:
+            self._problems = [None] * self.size
+
+        if (problem := self._problems[index]) is None:
+            problem = self._problems[index] = self._build(index)
+
+        return problem
+
+    def columns(self, index: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the num1, num2 and result columns of the problems at the given
+        indices.
+
+        Args:
+            index: The int64 indices of the problems in the table.
+        """
+        i_1, i_2 = np.divmod(index, self.width)
+        a = self.lower_1 + i_1
+        if self.skip_zero:
+            a = a + (a >= 0)
+        b = self.lower_2 + i_2
+
+        if self.operation == Operation.ADD:
+            return a, b, a + b
+        if self.operation == Operation.SUB:
+            return a + b, a, b
+        if self.operation == Operation.MUL:
+            return a, b, a * b
+
+        return a * b, a, b
+
+    def _build(self, index: int) -> Problem:
+        i_1, i_2 = divmod(index, self.width)
+        a = self.lower_1 + i_1
+        if self.skip_zero and a >= 0:
+            a += 1
+        b = self.lower_2 + i_2
+
+        if self.operation == Operation.ADD:
+            num1, num2, result = a, b, a + b
+        elif self.operation == Operation.SUB:
+            num1, num2, result = a + b, a, b
+        elif self.operation == Operation.MUL:
+            num1, num2, result = a, b, a * b
+        else:
+            num1, num2, result = a * b, a, b
+
+        return Problem(num1=num1, num2=num2, operation=self.operation, result=result)
+
+
+def problem_table(
+    operation: Operation, add_bounds: OpBounds, mul_bounds: OpBounds
+) -> ProblemTable:
+    """
+    Returns the shared table for the given operation, using the bounds that
+    apply to it.
+
+    Raises:
+        ValueError: If the bounds are invalid (i.e. lower > greater) or equal
+                    to 0 for the divisor.
+    """
+    bounds = add_bounds if operation in (Operation.ADD, Operation.SUB) else mul_bounds
+    return _problem_table(operation, bounds.bounds_1, bounds.bounds_2)
+
+
+@lru_cache(maxsize=256)
+def _problem_table(
+    operation: Operation, bounds_1: tuple[int, int], bounds_2: tuple[int, int]
+) -> ProblemTable:
+    return ProblemTable(operation, OpBounds(bounds_1=bounds_1, bounds_2=bounds_2))
+
+
+class ProblemSampler:
+    """
+    Represents a compiled problem generator for a set of operations and
+    bounds. The tables of the operations are resolved, and their bounds
+    validated, once on construction, so drawing a problem is two hashes and
+    two indexing operations.
+    """
+
+    def __init__(
+        self,
+        operations: tuple[Operation, ...] | list[Operation],
+        add_bounds: OpBounds,
+        mul_bounds: OpBounds,
+    ) -> None:
+        """
+        Raises:
+            ValueError: If the operations list is empty, or the bounds of an
+                        operation in the list are invalid (i.e. lower >
+                        greater) or equal to 0 for the divisor.
+        """
+        if not operations:
+            raise ValueError("No operations available to generate problems.")
+
+        self.operations = tuple(operations)
+        self.tables = tuple(
+            problem_table(operation, add_bounds, mul_bounds)
+            for operation in self.operations
+        )
+        self._codes = np.array(
+            [OPERATIONS.index(operation) for operation in self.operations],
+            dtype=np.uint8,
         )
 
-    @classmethod
-    def _generate_div(cls, bounds: OpBounds):
-        if bounds.bounds_1 == (0, 0):
-            raise ValueError("Divisor cannot have the range [0, 0].")
-
-        while mul_problem := cls._generate_mul(bounds):
-            if mul_problem.num1 != 0:
-                break
-
-        return cls(
-            num1=mul_problem.result,
-            num2=mul_problem.num1,
-            operation=Operation.DIV,
-            result=mul_problem.num2,
+    def at(self, seed: int, index: int) -> Problem:
+        """
+        Returns problem i of the sequence with the given seed in O(1).
+
+        Args:
+            seed: The seed of the sequence.
+            index: The position of the problem in the sequence.
+        """
+        table = self.tables[_word(seed, index, _LANE_OP) % len(self.tables)]
+        return table[_word(seed, index, _LANE_INDEX) % table.size]
+
+    def batch(self, seed: int, start: int, n: int) -> "ProblemBatch":
+        """
+        Returns problems start..start + n - 1 of the sequence with the given
+        seed as a ProblemBatch, agreeing with at.
+
+        Args:
+            seed: The seed of the sequence.
+            start: The position of the first problem in the sequence.
+            n: The number of problems to generate.
+        """
+        indices = np.arange(start, start + n, dtype=np.uint64)
+        choice = _words(seed, indices, _LANE_OP) % np.uint64(len(self.tables))
+        choice = choice.astype(np.intp)
+        words = _words(seed, indices, _LANE_INDEX)
+
+        index = np.empty(n, dtype=np.int64)
+        num1 = np.empty(n, dtype=np.int64)
+        num2 = np.empty(n, dtype=np.int64)
+        result = np.empty(n, dtype=np.int64)
+        tables: list[ProblemTable | None] = [None] * len(OPERATIONS)
+
+        for k, table in enumerate(self.tables):
+            tables[self._codes[k]] = table
+
+            mask = choice == k
+            index[mask] = (words[mask] % np.uint64(table.size)).astype(np.int64)
+            num1[mask], num2[mask], result[mask] = table.columns(index[mask])
+
+        return ProblemBatch(
+            num1=num1,
+            num2=num2,
+            op=self._codes[choice],
+            result=result,
+            index=index,
+            tables=tuple(tables),
         )
+
+
+class ProblemBatch(BaseModel):
+    """
+    Represents a batch of problems stored column-wise as NumPy arrays, with
+    operations stored as indices into OPERATIONS and each problem's index
+    into the table of its operation. Problems requested from the batch are the
+    tables' shared entries.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    num1: np.ndarray
+    num2: np.ndarray
+    op: np.ndarray
+    result: np.ndarray
+    index: np.ndarray
+    tables: tuple[ProblemTable | None, ...]
+
+    def __len__(self) -> int:
+        return len(self.op)
+
+    def __getitem__(self, index: int) -> Problem:
+        table = self.tables[self.op[index]]
+        assert table is not None
+        return table[int(self.index[index])]
+
+    def to_problems(self) -> list[Problem]:
+        """
+        Returns the Problem instance for every problem in the batch.
+        """
+        tables = self.tables
+        return [
+            tables[op][index]  # type: ignore[index]
+            for op, index in zip(self.op.tolist(), self.index.tolist())
+        ]
+
+
+# Counter-based generator: each problem consumes one 64-bit word per lane (the
+# operation and the table index), derived by hashing (seed, index, lane) with
+# the SplitMix64 finalizer. The scalar and array versions below must stay
+# bit-for-bit identical.
+
+_LANE_OP = 0
+_LANE_INDEX = 1
+_LANES = 2
+
+_MASK = (1 << 64) - 1
+_GAMMA = 0x9E3779B97F4A7C15
+_MUL_1 = 0xBF58476D1CE4E5B9
+_MUL_2 = 0x94D049BB133111EB
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def _word(seed: int, index: int, lane: int) -> int:
+    """
+    Returns the random 64-bit word for the given lane of problem i.
+    """
+    z = (seed + (index * _LANES + lane + 1) * _GAMMA) & _MASK
+    z = ((z ^ (z >> 30)) * _MUL_1) & _MASK
+    z = ((z ^ (z >> 27)) * _MUL_2) & _MASK
+    return z ^ (z >> 31)
+
+
+def _words(seed: int, indices: np.ndarray, lane: int) -> np.ndarray:
+    """
+    Returns the random 64-bit words for the given lane of each problem index,
+    with uint64 arithmetic wrapping like the masking in _word.
+    """
+    counters = indices * np.uint64(_LANES) + np.uint64(lane + 1)
+    z = np.uint64(seed & _MASK) + counters * np.uint64(_GAMMA)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(_MUL_1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(_MUL_2)
+    return z ^ (z >> np.uint64(31))
+
+
+def _check_bounds(bounds: tuple[int, int]) -> None:
+    """
+    Raises:
+        ValueError: If the bounds are invalid (i.e. lower > greater).
+    """
+    if bounds[0] > bounds[1]:
+        raise ValueError(f"Invalid bounds {bounds}.")
+
+
+def _check_divisor_bounds(bounds: tuple[int, int]) -> None:
+    """
+    Raises:
+        ValueError: If the bounds are invalid (i.e. lower > greater) or equal
+                    to [0, 0].
+    """
+    if bounds == (0, 0):
+        raise ValueError("Divisor cannot have the range [0, 0].")
+    _check_bounds(bounds)
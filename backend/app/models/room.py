@@ -2,14 +2,50 @@
 Represents rooms where players join and matches take place.
 """
 
+from enum import StrEnum
+
+from app.models.cache import CachedModel
 from app.models.match import Match, MatchSettings
 from app.models.player import Player
 from pydantic import BaseModel
 
 
-class Room(BaseModel):
+class RoomStatus(StrEnum):
     """
-    Represents a room where players join and matches take place.
+    Represents whether a room is waiting for a match or in one.
+    """
+
+    WAITING = "waiting"
+    IN_MATCH = "in_match"
+
+
+class RoomSummary(BaseModel):
+    """
+    Represents the lightweight projection of a room shown in the lobby.
+    """
+
+    id: str
+    host: str | None
+    player_count: int
+    status: RoomStatus
+    settings_digest: str
+
+
+class RoomPage(BaseModel):
+    """
+    Represents one page of the lobby, with the cursor to pass to get the next
+    page, or None if this is the last page.
+    """
+
+    rooms: list[RoomSummary]
+    next_cursor: str | None = None
+
+
+class Room(CachedModel):
+    """
+    Represents a room where players join and matches take place. The version
+    increases on every change to the room, including score changes, so
+    clients can tell whether anything changed since they last looked.
     """
 
     id: str
@@ -17,6 +53,35 @@ class Room(BaseModel):
     players: dict[str, Player] = {}
     match_settings: MatchSettings = MatchSettings()
     current_match: Match | None = None
+    version: int = 0
+
+    def touch(self) -> None:
+        """
+        Bumps the version of the room. The room's methods bump it themselves;
+        call this after changing the room elsewhere, such as when a player
+        scores in the current match.
+        """
+        self.version += 1
+        self.invalidate()
+
+    @property
+    def status(self) -> RoomStatus:
+        """
+        Whether the room is waiting for a match or in one.
+        """
+        return RoomStatus.IN_MATCH if self.current_match else RoomStatus.WAITING
+
+    def summary(self) -> RoomSummary:
+        """
+        Returns the lightweight projection of the room shown in the lobby.
+        """
+        return RoomSummary(
+            id=self.id,
+            host=self.host.name if self.host else None,
+            player_count=len(self.players),
+            status=self.status,
+            settings_digest=self.match_settings.digest,
+        )
 
     def add_player(self, player: Player) -> bool:
         """
@@ -33,6 +98,7 @@ class Room(BaseModel):
             return False
 
         self.players[player.name] = player
+        self.touch()
         return True
 
     def remove_player(self, player: Player) -> bool:
@@ -56,6 +122,7 @@ class Room(BaseModel):
                 next(iter(self.players.values()), None) if self.players else None
             )
 
+        self.touch()
         return True
 
     def update_settings(self, settings: MatchSettings) -> None:
@@ -67,6 +134,7 @@ class Room(BaseModel):
             settings: The settings to apply.
         """
         self.match_settings = settings
+        self.touch()
 
     def start_match(self) -> bool:
         """
@@ -76,12 +144,18 @@ class Room(BaseModel):
         Returns:
             True if the match was started successfully, False if there is
             already a match in progress.
+
+        Raises:
+            ValueError: If the match settings cannot generate problems. The
+                        room is left without a match.
         """
         if self.current_match:
             return False
 
-        self.current_match = Match(players=self.players, settings=self.match_settings)
-        self.current_match.start_match()
+        match = Match(players=self.players, settings=self.match_settings)
+        match.start_match()
+        self.current_match = match
+        self.touch()
         return True
 
     def end_match(self) -> bool:
@@ -97,4 +171,5 @@ class Room(BaseModel):
 
         self.current_match.end_match()
         self.current_match = None
+        self.touch()
         return True
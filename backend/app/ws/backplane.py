@@ -0,0 +1,249 @@
+"""
+Represents backplanes that carry room broadcasts between worker processes.
+"""
+
+import asyncio
+import os
+import socket
+import struct
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+from .frames import Frame
+
+Deliver = Callable[[str, str | None, Frame], None]
+
+# The largest datagram sent or received. Larger messages are not published.
+MAX_DATAGRAM = 1 << 16
+
+_HEADER = struct.Struct("<HH")
+
+# The descriptors of the slot files this process holds, kept open so the
+# locks last as long as the process.
+_slots: list[int] = []
+
+
+def claim_slot(directory: str, slots: int) -> int:
+    """
+    Claims the lowest free worker slot in a backplane directory, so workers
+    started with the same environment, as by uvicorn --workers, still get
+    distinct IDs. A slot is an exclusive lock on a file in the directory,
+    held for the life of the process and released by the OS when it exits,
+    so a restarted worker can take it over.
+
+    Args:
+        directory: The directory shared by the workers.
+        slots: The number of slots, one per worker.
+
+    Returns:
+        The claimed slot, from 0 to slots - 1.
+
+    Raises:
+        RuntimeError: If every slot is held by another worker.
+    """
+    # fcntl is Unix-only, like the Unix socket backplane itself.
+    import fcntl
+
+    os.makedirs(directory, exist_ok=True)
+    for slot in range(slots):
+        path = os.path.join(directory, f"worker-{slot}.lock")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+
+        _slots.append(fd)
+        return slot
+
+    raise RuntimeError(f"All {slots} worker slots in {directory} are taken.")
+
+
+class Backplane(ABC):
+    """
+    Represents a pub/sub channel between the websocket managers of several
+    workers. A manager publishes each room broadcast to the backplane, and
+    the backplane delivers it to the other managers, which send it to their
+    own connections only.
+
+    Only messages are fanned out. A room's state lives on the worker that
+    created it, and only that worker can apply its mutations; the backplane
+    just lets connections to the room on other workers receive its
+    messages.
+    """
+
+    def __init__(self) -> None:
+        self._deliver: Deliver | None = None
+
+    def attach(self, deliver: Deliver) -> None:
+        """
+        Sets the function that delivers messages published by other workers
+        to this worker's connections.
+
+        Args:
+            deliver: Called with the room ID, the player the message is for
+                     or None for the whole room, and the frame.
+        """
+        self._deliver = deliver
+
+    @abstractmethod
+    def publish(self, room_id: str, player: str | None, frame: Frame) -> None:
+        """
+        Publishes a message to the other workers without waiting for them.
+
+        Args:
+            room_id: The ID of the room the message is for.
+            player: The player the message is for, or None for the whole room.
+            frame: The frame to publish.
+        """
+
+    async def start(self) -> None:
+        """
+        Starts receiving messages from the other workers.
+        """
+
+    async def stop(self) -> None:
+        """
+        Stops receiving messages and releases the backplane's resources.
+        """
+
+    def _receive(self, room_id: str, player: str | None, frame: Frame) -> None:
+        if self._deliver is not None:
+            self._deliver(room_id, player, frame)
+
+
+class MemoryBackplane(Backplane):
+    """
+    Represents a backplane between managers in the same process, delivering
+    synchronously to every other backplane on the same bus. It is intended
+    for tests and for running several managers in one process.
+    """
+
+    def __init__(self, bus: list["MemoryBackplane"]) -> None:
+        """
+        Args:
+            bus: The backplanes to deliver to, shared by all of them. This
+                 backplane adds itself to it.
+        """
+        super().__init__()
+        self.bus = bus
+        bus.append(self)
+
+    def publish(self, room_id: str, player: str | None, frame: Frame) -> None:
+        for backplane in self.bus:
+            if backplane is not self:
+                backplane._receive(room_id, player, frame)
+
+    async def stop(self) -> None:
+        if self in self.bus:
+            self.bus.remove(self)
+
+
+class UnixSocketBackplane(Backplane):
+    """
+    Represents a backplane between workers on the same host. Each worker
+    binds a Unix datagram socket in a shared directory and publishes by
+    sending one datagram to every other socket there. Datagrams carry the
+    room ID, the player and the message's JSON, so each receiving worker
+    decodes a message once however many connections it delivers it to.
+
+    Delivery is best effort: a datagram that a peer cannot take right away
+    is dropped rather than waited for, so a stalled worker does not stall
+    the others.
+    """
+
+    def __init__(
+        self, directory: str, name: str | None = None, refresh: float = 1.0
+    ) -> None:
+        """
+        Args:
+            directory: The directory shared by the workers' sockets.
+            name: The name of this worker's socket, the process ID by default.
+            refresh: How often the directory is listed for peers, in seconds.
+        """
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{name or os.getpid()}.sock")
+        self.refresh = refresh
+        self.dropped = 0
+        self._socket: socket.socket | None = None
+        self._peers: list[str] = []
+        self._listed = float("-inf")
+
+    async def start(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self._socket = sock
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._read)
+
+    async def stop(self) -> None:
+        if (sock := self._socket) is None:
+            return
+
+        self._socket = None
+        asyncio.get_running_loop().remove_reader(sock.fileno())
+        sock.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def publish(self, room_id: str, player: str | None, frame: Frame) -> None:
+        if (sock := self._socket) is None:
+            return
+
+        room, name = room_id.encode(), (player or "").encode()
+        data = b"".join(
+            (_HEADER.pack(len(room), len(name)), room, name, frame.text.encode())
+        )
+        if len(data) > MAX_DATAGRAM:
+            self.dropped += 1
+            return
+
+        for peer in self.peers():
+            try:
+                sock.sendto(data, peer)
+            except (BlockingIOError, ConnectionRefusedError, FileNotFoundError):
+                # The peer is busy or gone, and delivery is best effort.
+                self.dropped += 1
+
+    def peers(self) -> list[str]:
+        """
+        Returns the socket paths of the other workers, listing the directory
+        again if the last listing is older than the refresh interval.
+        """
+        if (now := time.monotonic()) - self._listed >= self.refresh:
+            self._listed = now
+            self._peers = [
+                path
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith(".sock") and (path := entry.path) != self.path
+            ]
+        return self._peers
+
+    def _read(self) -> None:
+        sock = self._socket
+        while sock is not None:
+            try:
+                data = sock.recv(MAX_DATAGRAM)
+            except BlockingIOError:
+                return
+
+            try:
+                room_length, name_length = _HEADER.unpack_from(data)
+                offset = _HEADER.size
+                room_id = data[offset : offset + room_length].decode()
+                offset += room_length
+                player = data[offset : offset + name_length].decode() or None
+                offset += name_length
+                frame = Frame.from_text(data[offset:].decode())
+            except (UnicodeDecodeError, ValueError, struct.error):
+                self.dropped += 1
+                continue
+
+            self._receive(room_id, player, frame)
@@ -0,0 +1,229 @@
+"""
+Represents the wire encodings of websocket messages and their negotiation.
+"""
+
+import struct
+from collections.abc import Sequence
+
+from app.models.problem import OPERATIONS
+
+from .schemas import MessageType, WebSocketMessage
+
+BINARY_SUBPROTOCOL = "numracer.bin.v1"
+JSON_SUBPROTOCOL = "numracer.json"
+
+# Wire codes of the message types, stable across releases. Code 0 marks a
+# frame that carries the whole message as JSON after the code.
+_CODES: dict[MessageType, int] = {
+    MessageType.JOIN: 1,
+    MessageType.LEAVE: 2,
+    MessageType.UPDATE: 3,
+    MessageType.ANSWER: 4,
+    MessageType.VERDICT: 5,
+    MessageType.ERROR: 6,
+    MessageType.SCORES: 7,
+    MessageType.SYNC: 8,
+    MessageType.SNAPSHOT: 9,
+    MessageType.PATCH: 10,
+    MessageType.PING: 11,
+    MessageType.PONG: 12,
+}
+_TYPES = {code: message_type for message_type, code in _CODES.items()}
+_JSON = 0
+
+_CODE = struct.Struct("<B")
+_ANSWER = struct.Struct("<Bi")
+_VERDICT = struct.Struct("<BBi")
+_PROBLEM = struct.Struct("<iiBi")
+_SCORES = struct.Struct("<BH")
+_SCORE = struct.Struct("<i")
+
+_CORRECT = 1
+_HAS_PROBLEM = 2
+
+# Types packed as the type alone when the message carries nothing else.
+_BARE = {MessageType.PING, MessageType.PONG}
+
+
+class Codec:
+    """
+    Represents the JSON encoding of websocket messages, sent as text frames.
+    It is the fallback for clients that do not negotiate a subprotocol.
+    """
+
+    subprotocol: str | None = JSON_SUBPROTOCOL
+    binary = False
+
+    def encode(self, message: WebSocketMessage) -> str | bytes:
+        """
+        Encodes a message into the payload of a websocket frame.
+
+        Args:
+            message: The message to encode.
+        """
+        return message.model_dump_json()
+
+    def decode(self, data: str | bytes) -> WebSocketMessage:
+        """
+        Decodes the payload of a websocket frame into a message.
+
+        Args:
+            data: The payload to decode.
+
+        Raises:
+            ValueError: If the payload is not a valid message.
+        """
+        return WebSocketMessage.model_validate_json(data)
+
+
+class BinaryCodec(Codec):
+    """
+    Represents the compact binary encoding of websocket messages, sent as
+    binary frames. The first byte is the message type. ANSWER, VERDICT and
+    SCORES messages are packed little-endian:
+
+        ANSWER   type u8, answer i32
+        VERDICT  type u8, flags u8 (1 correct, 2 has problem), score i32,
+                 then num1 i32, num2 i32, operation u8, result i32 if there
+                 is a problem
+        SCORES   type u8, count u16, then per player: name length u8, UTF-8
+                 name, score i32
+        PING     type u8
+        PONG     type u8
+
+    The operation is its index in OPERATIONS. Messages of other types, or
+    whose payload does not fit the layout, are sent as a zero byte followed
+    by the message's JSON. The room and player are implied by the connection,
+    so packed messages omit them.
+    """
+
+    subprotocol = BINARY_SUBPROTOCOL
+    binary = True
+
+    def encode(self, message: WebSocketMessage) -> bytes:
+        try:
+            if message.type is MessageType.ANSWER:
+                return _ANSWER.pack(_CODES[MessageType.ANSWER], _int(message, "answer"))
+            if message.type is MessageType.VERDICT:
+                return _pack_verdict(message.payload)
+            if message.type is MessageType.SCORES:
+                return _pack_scores(message.payload["scores"])
+            if message.type in _BARE and _is_bare(message):
+                return _CODE.pack(_CODES[message.type])
+        except (KeyError, TypeError, ValueError, struct.error):
+            pass
+
+        return _CODE.pack(_JSON) + message.model_dump_json().encode()
+
+    def decode(self, data: str | bytes) -> WebSocketMessage:
+        if isinstance(data, str) or not data:
+            raise ValueError("Expected a binary frame")
+
+        try:
+            message_type = _TYPES.get(code := data[0])
+            if code == _JSON:
+                return WebSocketMessage.model_validate_json(data[1:])
+            if message_type is MessageType.ANSWER:
+                _, answer = _ANSWER.unpack(data)
+                return WebSocketMessage(type=message_type, payload={"answer": answer})
+            if message_type is MessageType.VERDICT:
+                return _unpack_verdict(data)
+            if message_type is MessageType.SCORES:
+                return _unpack_scores(data)
+            if message_type in _BARE and len(data) == 1:
+                return WebSocketMessage(type=message_type)
+        except (IndexError, UnicodeDecodeError, struct.error) as error:
+            raise ValueError("Malformed binary frame") from error
+
+        raise ValueError("Unknown message type")
+
+
+JSON = Codec()
+BINARY = BinaryCodec()
+
+# Codecs in the server's order of preference.
+CODECS: tuple[Codec, ...] = (BINARY, JSON)
+
+
+def negotiate(offered: Sequence[str]) -> Codec:
+    """
+    Returns the codec for the most preferred subprotocol the client offered
+    in its Sec-WebSocket-Protocol header, or JSON if it offered none the
+    server supports.
+
+    Args:
+        offered: The subprotocols the client offered.
+    """
+    for codec in CODECS:
+        if codec.subprotocol in offered:
+            return codec
+
+    return JSON
+
+
+def _int(message: WebSocketMessage, key: str) -> int:
+    value = message.payload[key]
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError(f"{key} must be an integer")
+    return value
+
+
+def _is_bare(message: WebSocketMessage) -> bool:
+    return not message.payload and message.room_id is None and message.player is None
+
+
+def _pack_verdict(payload: dict) -> bytes:
+    problem = payload["problem"]
+    flags = (_CORRECT if payload["correct"] else 0) | (_HAS_PROBLEM if problem else 0)
+    data = _VERDICT.pack(_CODES[MessageType.VERDICT], flags, payload["score"])
+
+    if problem:
+        data += _PROBLEM.pack(
+            problem["num1"],
+            problem["num2"],
+            OPERATIONS.index(problem["operation"]),
+            problem["result"],
+        )
+    return data
+
+
+def _unpack_verdict(data: bytes) -> WebSocketMessage:
+    _, flags, score = _VERDICT.unpack_from(data)
+    problem = None
+
+    if flags & _HAS_PROBLEM:
+        num1, num2, operation, result = _PROBLEM.unpack_from(data, _VERDICT.size)
+        problem = {
+            "num1": num1,
+            "num2": num2,
+            "operation": OPERATIONS[operation].value,
+            "result": result,
+        }
+
+    return WebSocketMessage(
+        type=MessageType.VERDICT,
+        payload={"correct": bool(flags & _CORRECT), "score": score, "problem": problem},
+    )
+
+
+def _pack_scores(scores: dict[str, int]) -> bytes:
+    parts = [_SCORES.pack(_CODES[MessageType.SCORES], len(scores))]
+    for name, score in scores.items():
+        encoded = name.encode()
+        parts += (_CODE.pack(len(encoded)), encoded, _SCORE.pack(score))
+    return b"".join(parts)
+
+
+def _unpack_scores(data: bytes) -> WebSocketMessage:
+    _, count = _SCORES.unpack_from(data)
+    offset = _SCORES.size
+    scores = {}
+
+    for _ in range(count):
+        length = data[offset]
+        name = data[offset + 1 : offset + 1 + length].decode()
+        offset += 1 + length
+        (scores[name],) = _SCORE.unpack_from(data, offset)
+        offset += _SCORE.size
+
+    return WebSocketMessage(type=MessageType.SCORES, payload={"scores": scores})
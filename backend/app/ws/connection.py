@@ -0,0 +1,235 @@
+"""
+Represents a websocket connection with a bounded outgoing queue.
+"""
+
+import asyncio
+import time
+from collections import deque
+from enum import StrEnum
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from .codec import JSON, Codec
+from .frames import Frame
+from .schemas import MessageType, WebSocketMessage
+
+# Close codes. 1013 is the standard "try again later"; 4000-4999 are
+# reserved for applications.
+SLOW_CONSUMER = 1013
+SERVER_FULL = 1013
+IDLE_TIMEOUT = 4000
+ROOM_FULL = 4001
+
+
+class OverflowPolicy(StrEnum):
+    """
+    Represents what a connection does when a message arrives while its
+    outgoing queue is full.
+
+    DROP_OLDEST drops the oldest queued message. COALESCE merges a SCORES
+    message into the SCORES message already queued, and otherwise drops the
+    oldest. DISCONNECT closes the connection as a slow consumer. Replies are
+    never dropped; see Connection.push.
+    """
+
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+class Connection:
+    """
+    Represents a websocket connection with a bounded outgoing queue drained
+    by its own writer task, so queueing a message never waits on the client.
+    A client that reads slowly or fails only affects its own connection.
+
+    Messages are queued on every broadcast, so it is a plain slotted class
+    rather than a model.
+    """
+
+    __slots__ = (
+        "websocket",
+        "room_id",
+        "player",
+        "codec",
+        "maxsize",
+        "policy",
+        "dropped",
+        "closed",
+        "close_code",
+        "last_seen",
+        "_queue",
+        "_replies",
+        "_ready",
+        "_task",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        room_id: str,
+        player: str,
+        maxsize: int = 64,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        codec: Codec = JSON,
+    ) -> None:
+        """
+        Args:
+            websocket: The accepted websocket to write to.
+            room_id: The ID of the room the connection is in.
+            player: The name of the player the connection belongs to.
+            maxsize: The maximum number of queued messages.
+            policy: What to do when a message arrives while the queue is full.
+            codec: The wire encoding negotiated with the client.
+        """
+        self.websocket = websocket
+        self.room_id = room_id
+        self.player = player
+        self.codec = codec
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self.close_code = SLOW_CONSUMER
+        self.last_seen = time.monotonic()
+        self._queue: deque[Frame] = deque()
+        self._replies: deque[Frame] = deque()
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._queue) + len(self._replies)
+
+    def start(self) -> None:
+        """
+        Starts the writer task on the running event loop.
+        """
+        self._task = asyncio.get_running_loop().create_task(self._write())
+
+    async def receive(self) -> WebSocketMessage:
+        """
+        Waits for the next message from the client and decodes it. Any frame
+        from the client, valid or not, counts as a sign of life.
+
+        Raises:
+            WebSocketDisconnect: If the client disconnected.
+            ValueError: If the frame is not a valid message.
+        """
+        event = await self.websocket.receive()
+        if event["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(event.get("code", 1000))
+
+        self.last_seen = time.monotonic()
+        data = event.get("bytes")
+        return self.codec.decode(data if data is not None else event.get("text", ""))
+
+    def push(self, frame: Frame, reply: bool = False) -> bool:
+        """
+        Queues a frame for the writer without waiting, applying the overflow
+        policy if the queue is full. The frame may be shared with other
+        connections, so it is encoded at most once between them.
+
+        Replies, such as the VERDICT to an answer, answer something only this
+        client asked for and cannot be recovered from a later message, so
+        they are never dropped. They are queued apart from the other frames
+        and written ahead of them, and a client that leaves maxsize replies
+        unread is closed as a slow consumer.
+
+        Args:
+            frame: The frame to queue.
+            reply: Whether the frame is a reply to this client.
+
+        Returns:
+            True if the frame was queued, False if the connection is closed
+            or was closed because of this frame.
+        """
+        if self.closed:
+            return False
+
+        if reply:
+            if len(self._replies) >= self.maxsize:
+                self.abort()
+                return False
+
+            self._replies.append(frame)
+            self._ready.set()
+            return True
+
+        queue = self._queue
+        if len(queue) >= self.maxsize:
+            self.dropped += 1
+            if self.policy is OverflowPolicy.DISCONNECT:
+                self.abort()
+                return False
+            if self.policy is OverflowPolicy.COALESCE and self._coalesce(frame):
+                return True
+            queue.popleft()
+
+        queue.append(frame)
+        self._ready.set()
+        return True
+
+    def abort(self, code: int = SLOW_CONSUMER) -> None:
+        """
+        Discards the queued frames and has the writer close the websocket
+        with the given close code.
+
+        Args:
+            code: The close code, a slow consumer by default.
+        """
+        self.closed = True
+        self.close_code = code
+        self._queue.clear()
+        self._replies.clear()
+        self._ready.set()
+
+    def close(self) -> None:
+        """
+        Stops the writer task without closing the websocket, for connections
+        the client already closed.
+        """
+        self.closed = True
+        self._queue.clear()
+        self._replies.clear()
+        if self._task is not None:
+            self._task.cancel()
+
+    def _coalesce(self, frame: Frame) -> bool:
+        message = frame.message
+        if message.type is not MessageType.SCORES:
+            return False
+
+        queue = self._queue
+        for i in range(len(queue) - 1, -1, -1):
+            queued = queue[i].message
+            if queued.type is MessageType.SCORES:
+                scores = queued.payload["scores"] | message.payload["scores"]
+                queue[i] = Frame(
+                    queued.model_copy(update={"payload": {"scores": scores}})
+                )
+                return True
+
+        return False
+
+    async def _write(self) -> None:
+        queue, replies, ready = self._queue, self._replies, self._ready
+        websocket, codec = self.websocket, self.codec
+        send = websocket.send_bytes if codec.binary else websocket.send_text
+
+        try:
+            while True:
+                await ready.wait()
+                while (replies or queue) and not self.closed:
+                    frame = replies.popleft() if replies else queue.popleft()
+                    await send(frame.encode(codec))
+
+                if self.closed:
+                    await websocket.close(code=self.close_code)
+                    return
+
+                ready.clear()
+        except Exception:
+            # The client is gone; the receive loop sees the disconnect.
+            self.closed = True
+            self._queue.clear()
+            self._replies.clear()
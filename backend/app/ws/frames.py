@@ -0,0 +1,116 @@
+"""
+Represents encoded websocket frames shared between recipients.
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+from .codec import Codec
+from .schemas import WebSocketMessage
+
+
+class Frame:
+    """
+    Represents a message and its encodings. The message is encoded the first
+    time a writer needs it in a given wire format, and every recipient using
+    that format then sends the same data, so a broadcast encodes at most once
+    per format however many connections it reaches.
+    """
+
+    __slots__ = ("message", "_text", "_binary")
+
+    def __init__(self, message: WebSocketMessage) -> None:
+        self.message = message
+        self._text: str | None = None
+        self._binary: bytes | None = None
+
+    @classmethod
+    def from_text(cls, text: str) -> "Frame":
+        """
+        Returns a frame for a message received as JSON text, keeping the text
+        as its JSON encoding.
+
+        Args:
+            text: The message's JSON.
+
+        Raises:
+            ValueError: If the text is not a valid message.
+        """
+        frame = cls(WebSocketMessage.model_validate_json(text))
+        frame._text = text
+        return frame
+
+    @property
+    def text(self) -> str:
+        """
+        The message encoded as JSON text.
+        """
+        if (text := self._text) is None:
+            text = self._text = self.message.model_dump_json()
+        return text
+
+    def encode(self, codec: Codec) -> str | bytes:
+        """
+        Returns the message encoded by the given codec.
+
+        Args:
+            codec: The codec of the connection the frame is sent on.
+        """
+        if not codec.binary:
+            return self.text
+
+        if (data := self._binary) is None:
+            data = self._binary = codec.encode(self.message)  # type: ignore[assignment]
+        return data  # type: ignore[return-value]
+
+
+class FrameCache:
+    """
+    Represents an LRU cache of frames that are sent again and again, such as
+    the state of a room that has not changed since the last tick, so they are
+    neither rebuilt nor re-encoded.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """
+        Args:
+            maxsize: The maximum number of frames kept.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._frames: OrderedDict[Hashable, Frame] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def get(self, key: Hashable, build: Callable[[], WebSocketMessage]) -> Frame:
+        """
+        Returns the cached frame for the given key, building and caching it
+        first if there is none.
+
+        Args:
+            key: The key of the frame. It must change whenever the message
+                 would, for example by including a version.
+            build: Builds the message on a cache miss.
+        """
+        frames = self._frames
+        if (frame := frames.get(key)) is not None:
+            frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+        self.misses += 1
+        frame = frames[key] = Frame(build())
+        if len(frames) > self.maxsize:
+            frames.popitem(last=False)
+        return frame
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Removes the frame for the given key if it is cached.
+
+        Args:
+            key: The key of the frame.
+        """
+        self._frames.pop(key, None)
@@ -0,0 +1,90 @@
+"""
+Handles websocket messages that act on the game state.
+"""
+
+from app.models.manager import Manager
+from app.models.match import Match, MatchState
+from app.models.room import Room
+
+from .schemas import MessageType, WebSocketMessage
+
+
+class AnswerHandler:
+    """
+    Handles ANSWER messages from one player's websocket. The player's slot in
+    the room's current match is resolved once and reused until a new match
+    starts, so each answer takes the allocation-free MatchState.answer path.
+    """
+
+    def __init__(self, manager: Manager, room_id: str, player: str) -> None:
+        self.manager = manager
+        self.room_id = room_id
+        self.player = player
+        self._room: Room | None = None
+        self._match: Match | None = None
+        self._state: MatchState | None = None
+        self._slot = 0
+
+    def __call__(self, message: WebSocketMessage) -> WebSocketMessage:
+        """
+        Handles a player's answer sent over the websocket.
+
+        Args:
+            message: The ANSWER message carrying the answer.
+
+        Returns:
+            A VERDICT message with whether the answer was correct, the
+            player's score and their current problem, or an ERROR message if
+            the answer is malformed or the room/match/player does not exist.
+        """
+        answer = message.payload.get("answer")
+        if not isinstance(answer, int) or isinstance(answer, bool):
+            return self._error("Answer must be an integer")
+
+        if not self._resolve():
+            return self._error("Room, match, or player not found")
+
+        state, slot = self._state, self._slot
+        assert self._room is not None and state is not None
+
+        verdict = state.answer(slot, answer)
+        if verdict:
+            self._room.touch()
+        player = state.players[slot]
+        problem = player.current_problem
+
+        return WebSocketMessage(
+            type=MessageType.VERDICT,
+            room_id=self.room_id,
+            player=self.player,
+            payload={
+                "correct": verdict,
+                "score": player.score,
+                "problem": problem.model_dump() if problem else None,
+            },
+        )
+
+    def _resolve(self) -> bool:
+        """
+        Re-resolves the player's slot if the room's current match changed.
+
+        Returns:
+            True if the player has a slot in the room's current match.
+        """
+        room = self.manager.get_room(self.room_id)
+        match = room.current_match if room else None
+
+        if room is not self._room or match is not self._match:
+            self._room, self._match, self._state = room, match, None
+            if resolved := self.manager.resolve_slot(self.room_id, self.player):
+                self._state, self._slot = resolved[0].state, resolved[1]
+
+        return self._state is not None
+
+    def _error(self, detail: str) -> WebSocketMessage:
+        return WebSocketMessage(
+            type=MessageType.ERROR,
+            room_id=self.room_id,
+            player=self.player,
+            payload={"detail": detail},
+        )
@@ -2,46 +2,342 @@
 Represents a manager that handles websocket connections and messaging per room.
 """
 
+import asyncio
+import time
+from collections.abc import Callable
+
 from fastapi import WebSocket
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from .backplane import Backplane
+from .codec import negotiate
+from .connection import (
+    IDLE_TIMEOUT,
+    ROOM_FULL,
+    SERVER_FULL,
+    Connection,
+    OverflowPolicy,
+)
+from .frames import Frame, FrameCache
+from .schemas import MessageType, WebSocketMessage
+
 
-from .schemas import WebSocketMessage
+def as_frame(message: WebSocketMessage | Frame) -> Frame:
+    """
+    Returns the given frame, or a new frame for the given message.
+    """
+    return message if isinstance(message, Frame) else Frame(message)
 
 
 class WebSocketManager(BaseModel):
     """
     Represents a manager that handles websocket connections and messaging per
-    room.
+    room. Connections are indexed by room and player, and a player may have
+    several connections open at once, so connecting, disconnecting and
+    sending to one player are O(1) in the size of the room.
+
+    Sending never waits on a client: each connection has a bounded outgoing
+    queue drained by its own writer task, and queue_size and overflow set how
+    those queues are bounded. Messages sent to one websocket or one player,
+    such as a VERDICT, are queued as replies and are never dropped by the
+    overflow policy. A broadcast is encoded into one frame that is
+    shared by every recipient, and frames that are sent repeatedly can be
+    kept in the frame cache.
+
+    Score changes are not sent as they happen. They are collected per room
+    and flushed once per tick as a single SCORES message carrying only the
+    players whose score changed, so outbound traffic is bounded by the tick
+    rate rather than the answer rate.
+
+    Every heartbeat_interval seconds each connection is sent a PING, and
+    connections the client has sent nothing on for idle_timeout seconds are
+    closed with IDLE_TIMEOUT and dropped, so dead sockets stop receiving
+    broadcasts. Connections beyond max_per_room in a room or max_connections
+    in the process are closed with ROOM_FULL or SERVER_FULL as soon as they
+    are accepted.
+
+    With a backplane attached, room broadcasts and messages to a player are
+    also published to the other workers, and messages they publish are sent
+    to this worker's connections. Room state is not shared, so clients that
+    act on a room still have to reach the worker that owns it.
     """
 
-    rooms: dict[str, list[WebSocket]] = {}
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    rooms: dict[str, dict[str, set[Connection]]] = {}
+    tick_rate: float = Field(default=10.0, gt=0)
+    queue_size: int = Field(default=64, gt=0)
+    overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST
+    heartbeat_interval: float = Field(default=20.0, gt=0)
+    idle_timeout: float = Field(default=60.0, gt=0)
+    max_per_room: int = Field(default=256, gt=0)
+    max_connections: int = Field(default=10_000, gt=0)
 
-    async def connect(self, room_id: str, websocket: WebSocket) -> None:
+    _connections: dict[WebSocket, Connection] = PrivateAttr(default_factory=dict)
+    _counts: dict[str, int] = PrivateAttr(default_factory=dict)
+    _frames: FrameCache = PrivateAttr(default_factory=FrameCache)
+    _scores: dict[str, dict[str, int]] = PrivateAttr(default_factory=dict)
+    _ticker: asyncio.Task | None = PrivateAttr(default=None)
+    _heartbeat: asyncio.Task | None = PrivateAttr(default=None)
+    _backplane: Backplane | None = PrivateAttr(default=None)
+    _tick_hooks: list[Callable[[], None]] = PrivateAttr(default_factory=list)
+
+    async def connect(
+        self, room_id: str, websocket: WebSocket, player: str
+    ) -> Connection | None:
         """
-        Connects a websocket to a room.
+        Connects a player's websocket to a room and starts its writer. The
+        wire encoding is the most preferred one among the subprotocols the
+        client offered, or JSON if it offered none the server supports.
 
         Args:
             room_id: The ID of the room to connect to.
             websocket: The websocket to connect.
+            player: The name of the player connecting.
+
+        Returns:
+            The connection wrapping the websocket, or None if the room or the
+            process is at its connection limit, in which case the websocket
+            has been closed.
         """
-        await websocket.accept()
-        self.rooms[room_id].append(websocket)
+        offered = websocket.scope.get("subprotocols", ())
+        codec = negotiate(offered)
+        subprotocol = codec.subprotocol if codec.subprotocol in offered else None
+        await websocket.accept(subprotocol=subprotocol)
+
+        if len(self._connections) >= self.max_connections:
+            await websocket.close(code=SERVER_FULL)
+            return None
+        if self._counts.get(room_id, 0) >= self.max_per_room:
+            await websocket.close(code=ROOM_FULL)
+            return None
+
+        connection = Connection(
+            websocket, room_id, player, self.queue_size, self.overflow, codec
+        )
+        connection.start()
+        self._connections[websocket] = connection
+        self._counts[room_id] = self._counts.get(room_id, 0) + 1
+        self.rooms.setdefault(room_id, {}).setdefault(player, set()).add(connection)
+        return connection
 
     def disconnect(self, room_id: str, websocket: WebSocket) -> None:
         """
-        Disconnects a websocket from a room.
+        Disconnects a websocket from a room and stops its writer.
 
         Args:
             room_id: The ID of the room to disconnect from.
             websocket: The websocket to disconnect.
         """
-        self.rooms[room_id].remove(websocket)
-        if not self.rooms[room_id]:
-            del self.rooms[room_id]
+        if (connection := self._connections.get(websocket)) is not None:
+            connection.close()
+            self._unregister(connection)
+
+    def reap(self) -> int:
+        """
+        Closes and drops every connection the client has sent nothing on for
+        idle_timeout seconds.
+
+        Returns:
+            The number of connections reaped.
+        """
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [c for c in self._connections.values() if c.last_seen < deadline]
+
+        for connection in idle:
+            connection.abort(IDLE_TIMEOUT)
+            self._unregister(connection)
+        return len(idle)
+
+    def _broadcast_local(self, room_id: str, frame: Frame) -> None:
+        for connections in self.rooms.get(room_id, {}).values():
+            for connection in connections:
+                connection.push(frame)
+
+    def _send_local(self, room_id: str, player: str, frame: Frame) -> int:
+        if (connections := self.rooms.get(room_id, {}).get(player)) is None:
+            return 0
+
+        return sum(connection.push(frame, reply=True) for connection in connections)
+
+    def _deliver(self, room_id: str, player: str | None, frame: Frame) -> None:
+        if player is None:
+            self._broadcast_local(room_id, frame)
+        else:
+            self._send_local(room_id, player, frame)
+
+    def _unregister(self, connection: Connection) -> None:
+        del self._connections[connection.websocket]
+
+        room_id = connection.room_id
+        if count := self._counts[room_id] - 1:
+            self._counts[room_id] = count
+        else:
+            del self._counts[room_id]
+
+        players = self.rooms[room_id]
+        connections = players[connection.player]
+        connections.discard(connection)
+        if not connections:
+            del players[connection.player]
+            if not players:
+                del self.rooms[room_id]
+                self._scores.pop(room_id, None)
+
+    @property
+    def frames(self) -> FrameCache:
+        """
+        The cache of frames that are broadcast repeatedly.
+        """
+        return self._frames
+
+    def send(self, websocket: WebSocket, message: WebSocketMessage | Frame) -> bool:
+        """
+        Queues a message for a single websocket, as a reply that the
+        overflow policy does not drop.
+
+        Args:
+            websocket: The websocket to send to.
+            message: The message, or already built frame, to send.
+
+        Returns:
+            True if the message was queued, False if the websocket is not
+            connected or its connection is closed.
+        """
+        if (connection := self._connections.get(websocket)) is None:
+            return False
+
+        return connection.push(as_frame(message), reply=True)
+
+    def attach_backplane(self, backplane: Backplane) -> None:
+        """
+        Attaches a backplane to exchange room broadcasts and messages to
+        players with the other workers.
+
+        Args:
+            backplane: The backplane to attach.
+        """
+        backplane.attach(self._deliver)
+        self._backplane = backplane
+
+    def broadcast(self, room_id: str, message: WebSocketMessage | Frame) -> None:
+        """
+        Queues a message for every websocket connected to a room, on this
+        worker and, through the backplane, on the others. The message is
+        encoded once for all of them.
+
+        Args:
+            room_id: The ID of the room to broadcast to.
+            message: The message, or already built frame, to send.
+        """
+        frame = as_frame(message)
+        self._broadcast_local(room_id, frame)
+        if self._backplane is not None:
+            self._backplane.publish(room_id, None, frame)
+
+    def send_to_player(
+        self, room_id: str, player: str, message: WebSocketMessage | Frame
+    ) -> int:
+        """
+        Queues a message for every websocket a player has connected to a
+        room, without touching the room's other connections, as a reply
+        that the overflow policy does not drop. With a backplane, the message
+        is also published for the player's websockets on other workers.
+
+        Args:
+            room_id: The ID of the room the player is in.
+            player: The name of the player to send to.
+            message: The message, or already built frame, to send.
+
+        Returns:
+            The number of connections on this worker the message was queued
+            for.
+        """
+        frame = as_frame(message)
+        if self._backplane is not None:
+            self._backplane.publish(room_id, player, frame)
+        return self._send_local(room_id, player, frame)
+
+    def publish_score(self, room_id: str, player: str, score: int) -> None:
+        """
+        Records a player's new score to be broadcast on the next tick. Only
+        the latest score of each player is kept until then. Scores for rooms
+        with no connections on this worker are dropped, unless a backplane
+        is attached, since the room may have connections on other workers.
+
+        Args:
+            room_id: The ID of the room the player is in.
+            player: The name of the player.
+            score: The player's new score.
+        """
+        if room_id in self.rooms or self._backplane is not None:
+            self._scores.setdefault(room_id, {})[player] = score
+
+    def add_tick_hook(self, hook: Callable[[], None]) -> None:
+        """
+        Registers a function to run on every tick, after the score changes
+        are flushed.
+
+        Args:
+            hook: The function to run.
+        """
+        self._tick_hooks.append(hook)
+
+    def flush(self) -> None:
+        """
+        Broadcasts one SCORES message to each room with score changes since
+        the last flush, carrying {"scores": {player: score}} for the players
+        whose score changed, then runs the tick hooks.
+        """
+        pending, self._scores = self._scores, {}
+
+        for room_id, scores in pending.items():
+            self.broadcast(
+                room_id,
+                WebSocketMessage(
+                    type=MessageType.SCORES,
+                    room_id=room_id,
+                    payload={"scores": scores},
+                ),
+            )
+
+        for hook in self._tick_hooks:
+            hook()
+
+    def start(self) -> None:
+        """
+        Starts the broadcast tick and the heartbeat on the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._ticker is None or self._ticker.done():
+            self._ticker = loop.create_task(self._tick())
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = loop.create_task(self._beat())
+
+    async def stop(self) -> None:
+        """
+        Stops the broadcast tick and the heartbeat, and flushes any pending
+        score changes.
+        """
+        tasks = [task for task in (self._ticker, self._heartbeat) if task]
+        self._ticker = self._heartbeat = None
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.flush()
 
-    async def send(self, websocket: WebSocket, message: WebSocketMessage) -> None:
-        await websocket.send_json(message.payload)
+    async def _tick(self) -> None:
+        interval = 1 / self.tick_rate
+        while True:
+            await asyncio.sleep(interval)
+            self.flush()
 
-    async def broadcast(self, room_id: str, message: WebSocketMessage) -> None:
-        for connection in self.rooms.get(room_id, []):
-            await connection.send_json(message.payload)
+    async def _beat(self) -> None:
+        ping = Frame(WebSocketMessage(type=MessageType.PING))
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self.reap()
+            for connection in self._connections.values():
+                connection.push(ping)
@@ -15,14 +15,51 @@ class MessageType(StrEnum):
     JOIN = "join"
     LEAVE = "leave"
     UPDATE = "update"
+    ANSWER = "answer"
+    VERDICT = "verdict"
+    SCORES = "scores"
+    SYNC = "sync"
+    SNAPSHOT = "snapshot"
+    PATCH = "patch"
+    PING = "ping"
+    PONG = "pong"
+    ERROR = "error"
 
 
 class WebSocketMessage(BaseModel):
     """
     Represents a websocket message schema.
+
+    An ANSWER message from a player carries {"answer": int} as its payload.
+    It is answered with a VERDICT message carrying {"correct": bool,
+    "score": int, "problem": Problem | None}, sent to every socket the player
+    has open in the room, or with an ERROR message carrying {"detail": str}
+    on the same socket.
+
+    A SCORES message is broadcast by the server once per tick to rooms where
+    scores changed, carrying {"scores": {player: score}} for those players.
+
+    A SYNC message from a client subscribes it to the room state, which is
+    sent as a SNAPSHOT followed by sequenced PATCH messages. See
+    app.ws.sync.StateSync.
+
+    The server sends PING messages as a heartbeat. Clients should reply with
+    PONG, though any message keeps a connection alive. A PING from a client
+    is replied to with a PONG.
+
+    JOIN, LEAVE and UPDATE messages from a client are relayed to the whole
+    room, with room_id and player set to the sender's. Any other type from a
+    client is answered with an ERROR, so clients cannot forge server
+    messages.
     """
 
     type: MessageType
     room_id: str | None = None
     player: str | None = None
     payload: dict = {}
+
+
+RELAYED_TYPES = frozenset({MessageType.JOIN, MessageType.LEAVE, MessageType.UPDATE})
+"""
+The message types a client may send for the server to relay to its room.
+"""
@@ -0,0 +1,282 @@
+"""
+Represents the room state sync protocol: a snapshot, then sequenced patches.
+"""
+
+import json
+import secrets
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Callable
+
+from app.models.manager import Manager
+
+from .connection import Connection
+from .frames import Frame, FrameCache
+from .schemas import MessageType, WebSocketMessage
+
+
+def diff(old: Any, new: Any, path: tuple = ()) -> list[dict]:
+    """
+    Returns the operations that turn one JSON value into another. Objects are
+    compared key by key, and any other value that changed is replaced whole.
+
+    Args:
+        old: The previous value.
+        new: The current value.
+        path: The path of the values from the root of the state.
+
+    Returns:
+        A list of {"op": "set", "path": [...], "value": ...} and
+        {"op": "del", "path": [...]} operations.
+    """
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return [] if old == new else [{"op": "set", "path": list(path), "value": new}]
+
+    ops = [{"op": "del", "path": [*path, key]} for key in old if key not in new]
+    for key, value in new.items():
+        if key not in old:
+            ops.append({"op": "set", "path": [*path, key], "value": value})
+        elif old[key] != value:
+            ops += diff(old[key], value, (*path, key))
+    return ops
+
+
+def apply_patch(state: Any, ops: list[dict]) -> Any:
+    """
+    Applies the operations returned by diff to a JSON value in place.
+
+    Args:
+        state: The value to patch.
+        ops: The operations to apply, in order.
+
+    Returns:
+        The patched value, which is a new value if the root was replaced.
+    """
+    for op in ops:
+        *parents, key = op["path"] or [None]
+        if key is None:
+            state = op.get("value")
+            continue
+
+        target = state
+        for parent in parents:
+            target = target[parent]
+
+        if op["op"] == "del":
+            del target[key]
+        else:
+            target[key] = op["value"]
+    return state
+
+
+def new_epoch() -> int:
+    """
+    Returns a fresh random epoch. Epochs are not reused across workers or
+    restarts, so a client never resumes from patches of another incarnation
+    of its room. They fit in 53 bits so JavaScript clients read them
+    exactly.
+    """
+    return secrets.randbits(53)
+
+
+class RoomSync:
+    """
+    Represents the sync state of one room: the last state sent to its
+    subscribers, the room version it was taken at, its sequence number and a
+    ring buffer of its most recent patches.
+    """
+
+    __slots__ = (
+        "room_id",
+        "epoch",
+        "seq",
+        "version",
+        "state",
+        "subscribers",
+        "history",
+        "idle_since",
+    )
+
+    def __init__(self, room_id: str, epoch: int, history: int) -> None:
+        self.room_id = room_id
+        self.epoch = epoch
+        self.seq = 0
+        self.version = -1
+        self.state: dict | None = None
+        self.subscribers: set[Connection] = set()
+        self.history: deque[Frame] = deque(maxlen=history)
+        self.idle_since: float | None = None
+
+    def replay(self, seq: int) -> list[Frame] | None:
+        """
+        Returns the patches after the given sequence number, or None if some
+        of them are no longer in the ring buffer.
+
+        Args:
+            seq: The last sequence number the client saw.
+        """
+        gap = self.seq - seq
+        if not 0 <= gap <= len(self.history):
+            return None
+
+        return list(islice(self.history, len(self.history) - gap, None))
+
+
+class StateSync:
+    """
+    Represents the room state sync protocol on the room websockets. A client
+    sends SYNC to subscribe and is sent a SNAPSHOT of the room carrying
+    {"epoch": int, "seq": int, "state": Room | None}. Once per tick, each
+    room whose version changed is diffed against the state last sent, and
+    its subscribers are sent one PATCH carrying {"seq": int, "ops": [...]}
+    with the next sequence number. A state of None means the room was
+    deleted.
+
+    A client that sees a gap in the sequence, or reconnects, sends SYNC with
+    the {"epoch": int, "seq": int} it last saw. The patches it missed are
+    replayed from the room's ring buffer, or a snapshot is sent if they have
+    aged out of it or the epoch changed. Rooms keep being tracked for
+    retention seconds after their last subscriber leaves, so a client that
+    drops briefly can resume.
+
+    Rooms are diffed against their last version only when it changed, so
+    steady-state traffic is proportional to what changed in a room rather
+    than to its size. Rooms are only read, synchronously on the event loop,
+    so the sync does not go through the room actors.
+    """
+
+    def __init__(
+        self,
+        frames: FrameCache,
+        history: int = 256,
+        retention: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            frames: The cache the snapshot frames are shared through.
+            history: The number of recent patches kept per room.
+            retention: How long a room without subscribers is still tracked,
+                       in seconds.
+            clock: The clock that measures retention.
+        """
+        self.frames = frames
+        self.history = history
+        self.retention = retention
+        self.clock = clock
+        self.rooms: dict[str, RoomSync] = {}
+
+    def subscribe(
+        self,
+        manager: Manager,
+        connection: Connection,
+        epoch: int | None = None,
+        seq: int | None = None,
+    ) -> None:
+        """
+        Subscribes a connection to the state of its room, first sending any
+        pending patch to the existing subscribers. The connection is sent the
+        patches after the given sequence number if they are all still
+        buffered and fit in its queue, and a snapshot otherwise. Either way
+        they are sent as replies, so the overflow policy cannot drop them
+        and leave the client with the same gap on every resume.
+
+        Args:
+            manager: The manager holding the room.
+            connection: The connection to subscribe.
+            epoch: The epoch of the last snapshot the client saw, if any.
+            seq: The last sequence number the client saw, if any.
+        """
+        room_id = connection.room_id
+        if (sync := self.rooms.get(room_id)) is None:
+            sync = RoomSync(room_id, new_epoch(), self.history)
+            self.rooms[room_id] = sync
+
+        self._advance(manager, sync)
+        sync.subscribers.add(connection)
+        sync.idle_since = None
+
+        if epoch == sync.epoch and isinstance(seq, int) and not isinstance(seq, bool):
+            missed = sync.replay(seq)
+            free = connection.maxsize - len(connection)
+            if missed is not None and len(missed) <= free:
+                for frame in missed:
+                    connection.push(frame, reply=True)
+                return
+
+        connection.push(self._snapshot(sync), reply=True)
+
+    def unsubscribe(self, connection: Connection) -> None:
+        """
+        Unsubscribes a connection from the state of its room. The room stays
+        tracked for the retention period so the client can resume.
+
+        Args:
+            connection: The connection to unsubscribe.
+        """
+        if (sync := self.rooms.get(connection.room_id)) is not None:
+            sync.subscribers.discard(connection)
+            if not sync.subscribers and sync.idle_since is None:
+                sync.idle_since = self.clock()
+
+    def flush(self, manager: Manager) -> None:
+        """
+        Sends a patch to the subscribers of each room that changed since the
+        last flush, and stops tracking rooms that were deleted or have had no
+        subscribers for the retention period. Intended to run once per
+        broadcast tick.
+
+        Args:
+            manager: The manager holding the rooms.
+        """
+        now = self.clock()
+
+        for room_id, sync in list(self.rooms.items()):
+            sync.subscribers = {c for c in sync.subscribers if not c.closed}
+            if not sync.subscribers:
+                if sync.idle_since is None:
+                    sync.idle_since = now
+                elif now - sync.idle_since >= self.retention:
+                    del self.rooms[room_id]
+                    continue
+
+            self._advance(manager, sync)
+            if sync.state is None and not sync.subscribers:
+                del self.rooms[room_id]
+
+    def _advance(self, manager: Manager, sync: RoomSync) -> None:
+        room = manager.get_room(sync.room_id)
+        version = room.version if room is not None else None
+        if version == sync.version:
+            return
+
+        state = json.loads(room.dump_json()) if room is not None else None
+        if sync.version != -1:
+            sync.seq += 1
+            frame = Frame(
+                WebSocketMessage(
+                    type=MessageType.PATCH,
+                    room_id=sync.room_id,
+                    payload={"seq": sync.seq, "ops": diff(sync.state, state)},
+                )
+            )
+            sync.history.append(frame)
+            for connection in sync.subscribers:
+                connection.push(frame)
+
+        sync.version, sync.state = version, state
+
+    def _snapshot(self, sync: RoomSync) -> Frame:
+        return self.frames.get(
+            ("snapshot", sync.room_id, sync.epoch, sync.seq),
+            lambda: WebSocketMessage(
+                type=MessageType.SNAPSHOT,
+                room_id=sync.room_id,
+                payload={
+                    "epoch": sync.epoch,
+                    "seq": sync.seq,
+                    "state": sync.state,
+                },
+            ),
+        )
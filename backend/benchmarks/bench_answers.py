@@ -0,0 +1,104 @@
+"""
+Measures correct answers handled per second on one core along three paths:
+the baseline from before the fast path existed, which builds a Player for
+each answer, looks the player up by name, calls Player.check and assigns a
+freshly generated problem; the name-based Manager.handle_answer slow path still used by the HTTP route;
+and the slot-based MatchState.answer fast path used by the websocket.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_answers
+"""
+
+import random
+import time
+
+from app.models.manager import Manager
+from app.models.player import Player
+from app.models.problem import Problem
+
+PLAYERS = 50
+ANSWERS = 200_000
+
+
+def setup() -> tuple[Manager, str]:
+    manager = Manager()
+    room_id = manager.create_room(Player(name="player-0"))
+    for i in range(1, PLAYERS):
+        manager.add_player(room_id, Player(name=f"player-{i}"))
+    manager.start_match(room_id)
+    return manager, room_id
+
+
+def bench_baseline() -> float:
+    manager, room_id = setup()
+    match = manager.rooms[room_id].current_match
+    assert match is not None
+    settings = match.settings
+    names = [f"player-{i % PLAYERS}" for i in range(ANSWERS)]
+
+    start = time.perf_counter()
+    for name in names:
+        player = Player(name=name)
+        room = manager.get_room(room_id)
+        assert room is not None and room.current_match is not None
+        match_player = room.current_match.players[player.name]
+        problem = match_player.current_problem
+        assert problem is not None
+        if match_player.check(problem.result):
+            match_player.assign_problem(
+                Problem.generate(
+                    random.choice(settings.operations),
+                    settings.add_bounds,
+                    settings.mul_bounds,
+                )
+            )
+    return ANSWERS / (time.perf_counter() - start)
+
+
+def bench_handle_answer() -> float:
+    manager, room_id = setup()
+    match = manager.rooms[room_id].current_match
+    assert match is not None
+    names = [f"player-{i % PLAYERS}" for i in range(ANSWERS)]
+
+    start = time.perf_counter()
+    for name in names:
+        problem = match.players[name].current_problem
+        assert problem is not None
+        manager.handle_answer(room_id, Player(name=name), problem.result)
+        manager.top_up(room_id)
+    return ANSWERS / (time.perf_counter() - start)
+
+
+def bench_answer_slot() -> float:
+    manager, room_id = setup()
+    match = manager.rooms[room_id].current_match
+    assert match is not None and match.state is not None
+    state = match.state
+    slots = [match.slot_of(f"player-{i % PLAYERS}") for i in range(ANSWERS)]
+
+    start = time.perf_counter()
+    for slot in slots:
+        assert slot is not None
+        problem = state.players[slot].current_problem
+        assert problem is not None
+        state.answer(slot, problem.result)
+        state.deck.top_up(state.lead)
+    return ANSWERS / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    baseline = bench_baseline()
+    slow = bench_handle_answer()
+    fast = bench_answer_slot()
+
+    print(f"Baseline, Player.check:       {baseline:>12,.0f} answers/s")
+    print(
+        f"Slow path, handle_answer:     {slow:>12,.0f} answers/s "
+        f"({slow / baseline:.1f}x baseline)"
+    )
+    print(
+        f"Fast path, MatchState.answer: {fast:>12,.0f} answers/s "
+        f"({fast / baseline:.1f}x baseline)"
+    )
@@ -0,0 +1,52 @@
+"""
+Measures the CPU cost of encoding one broadcast to a room of viewers, by
+encoding the message once per connection and by encoding one shared frame.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_broadcast
+"""
+
+import time
+
+from app.ws.frames import Frame
+from app.ws.schemas import MessageType, WebSocketMessage
+
+VIEWERS = 100
+BROADCASTS = 2_000
+
+
+def message() -> WebSocketMessage:
+    return WebSocketMessage(
+        type=MessageType.SCORES,
+        room_id="ABCDE",
+        payload={"scores": {f"player-{i}": i for i in range(50)}},
+    )
+
+
+def bench_per_connection() -> float:
+    start = time.perf_counter()
+    for _ in range(BROADCASTS):
+        broadcast = message()
+        for _ in range(VIEWERS):
+            broadcast.model_dump_json()
+    return BROADCASTS / (time.perf_counter() - start)
+
+
+def bench_shared_frame() -> float:
+    start = time.perf_counter()
+    for _ in range(BROADCASTS):
+        frame = Frame(message())
+        for _ in range(VIEWERS):
+            frame.text
+    return BROADCASTS / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    before = bench_per_connection()
+    after = bench_shared_frame()
+
+    print(f"Encode per connection: {before:>10,.0f} broadcasts/s")
+    print(
+        f"Encode once:           {after:>10,.0f} broadcasts/s ({after / before:.1f}x)"
+    )
@@ -0,0 +1,18 @@
+import pytest
+from app import main
+from app.api.routes import rooms
+from app.models.actor import ActorSystem
+from app.models.manager import Manager
+from app.models.matchmaking import Matchmaker
+from app.ws.frames import FrameCache
+from app.ws.sync import StateSync
+
+
+@pytest.fixture(autouse=True)
+def manager(monkeypatch: pytest.MonkeyPatch) -> Manager:
+    manager = Manager()
+    monkeypatch.setattr(rooms, "manager", manager)
+    monkeypatch.setattr(rooms, "actors", ActorSystem(manager))
+    monkeypatch.setattr(rooms, "matchmaker", Matchmaker(manager))
+    monkeypatch.setattr(main, "state_sync", StateSync(FrameCache()))
+    return manager
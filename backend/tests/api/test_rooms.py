@@ -1,11 +1,17 @@
+from collections.abc import Iterator
+from pathlib import Path
+
 import pytest
+from app.api.routes import rooms
 from app.main import app
+from app.models.manager import Manager
 from fastapi.testclient import TestClient
 
 
 @pytest.fixture
-def client() -> TestClient:
-    return TestClient(app)
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture
@@ -70,7 +76,44 @@ def test_get_rooms(client: TestClient) -> None:
     res = client.get("/rooms/")
 
     assert res.status_code == 200
-    assert isinstance(res.json(), list)
+    assert isinstance(res.json()["rooms"], list)
+
+
+def test_get_rooms_paginated(client: TestClient, room: dict) -> None:
+    for i in range(5):
+        client.post("/rooms/", params={"host": f"Player {i}"})
+
+    ids = []
+    cursor = None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = client.get("/rooms/", params=params).json()
+        ids += [summary["id"] for summary in page["rooms"]]
+        if (cursor := page["next_cursor"]) is None:
+            break
+
+    assert room["id"] in ids
+    assert len(ids) == len(set(ids))
+
+
+def test_get_rooms_summary(client: TestClient, room: dict) -> None:
+    client.post(f"/rooms/start/{room['id']}")
+    res = client.get("/rooms/", params={"status": "in_match"})
+
+    summary = next(s for s in res.json()["rooms"] if s["id"] == room["id"])
+    assert summary["host"] == "Host"
+    assert summary["player_count"] == 1
+    assert summary["status"] == "in_match"
+    assert "players" not in summary
+
+    res = client.get("/rooms/", params={"status": "waiting"})
+    assert room["id"] not in [s["id"] for s in res.json()["rooms"]]
+
+
+def test_get_rooms_invalid_cursor(client: TestClient) -> None:
+    res = client.get("/rooms/", params={"cursor": "abc"})
+
+    assert res.status_code == 400
 
 
 def test_delete_room(client: TestClient, room: dict) -> None:
@@ -231,3 +274,175 @@ def test_handle_answer_nonexistent_player(client: TestClient, room: dict) -> Non
     )
 
     assert res.status_code == 404
+
+
+def test_get_room_etag(client: TestClient, room: dict, player_1: dict) -> None:
+    res = client.get(f"/rooms/{room['id']}")
+    etag = res.headers["etag"]
+
+    res = client.get(f"/rooms/{room['id']}", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+
+    client.post(f"/rooms/add/{room['id']}", params=player_1)
+
+    res = client.get(f"/rooms/{room['id']}", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["etag"] != etag
+
+
+def test_get_room_etag_reused_code(client: TestClient, manager: Manager) -> None:
+    manager._codes.quarantine = 0.0
+
+    room_id = client.post("/rooms/", params={"host": "Host"}).json()
+    etag = client.get(f"/rooms/{room_id}").headers["etag"]
+    client.delete(f"/rooms/{room_id}")
+
+    # The released code is reissued straight away, to a new room at version 0.
+    assert client.post("/rooms/", params={"host": "Host"}).json() == room_id
+
+    res = client.get(f"/rooms/{room_id}", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["etag"] != etag
+
+
+def test_get_room_etag_score(client: TestClient, room: dict, host: dict) -> None:
+    client.post(f"/rooms/start/{room['id']}")
+    etag = client.get(f"/rooms/{room['id']}").headers["etag"]
+
+    client.post(f"/rooms/answer/{room['id']}", params=host | {"answer": 3})
+
+    res = client.get(f"/rooms/{room['id']}", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+
+
+def test_get_rooms_etag(client: TestClient, room: dict) -> None:
+    etag = client.get("/rooms/").headers["etag"]
+
+    res = client.get("/rooms/", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+    client.post("/rooms/", params={"host": "Other"})
+
+    res = client.get("/rooms/", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+
+
+def test_serialization_stats(client: TestClient, room: dict) -> None:
+    client.get(f"/rooms/{room['id']}")
+    client.get(f"/rooms/{room['id']}")
+
+    stats = client.get("/rooms/stats/serialization").json()["Room"]
+    assert stats["hits"] >= 1
+    assert 0 < stats["hit_rate"] <= 1
+
+
+def test_create_room_host_in_room(client: TestClient, room: dict) -> None:
+    res = client.post("/rooms/", params={"host": "Host"})
+
+    assert res.status_code == 409
+
+
+def test_locate_player(client: TestClient, room: dict, player_1: dict) -> None:
+    res = client.get(f"/rooms/locate/{player_1['player']}")
+    assert res.status_code == 404
+
+    client.post(f"/rooms/add/{room['id']}", params=player_1)
+
+    res = client.get(f"/rooms/locate/{player_1['player']}")
+    assert res.status_code == 200
+    assert res.json() == room["id"]
+
+
+def test_quick_join(client: TestClient) -> None:
+    response = client.post("/rooms/quick_join", params={"player": "Alice"})
+    assert response.status_code == 200
+    assert response.json() == {"room_id": None, "queued": True}
+    assert client.get("/rooms/locate/Alice").status_code == 404
+
+    response = client.post("/rooms/quick_join", params={"player": "Bob"})
+    room_id = response.json()["room_id"]
+    assert room_id is not None
+    assert client.get("/rooms/locate/Alice").json() == room_id
+    assert client.get(f"/rooms/{room_id}").json()["current_match"]["active"]
+
+    response = client.post("/rooms/quick_join", params={"player": "Alice"})
+    assert response.status_code == 409
+
+
+def test_quick_join_invalid_settings(client: TestClient) -> None:
+    for player in ("Alice", "Bob"):
+        response = client.post(
+            "/rooms/quick_join",
+            params={"player": player},
+            json={"operations": []},
+        )
+        assert response.status_code == 422
+
+        response = client.post(
+            "/rooms/quick_join",
+            params={"player": player},
+            json={
+                "operations": ["+"],
+                "add_bounds": {"bounds_1": [0, 10**12], "bounds_2": [0, 10**12]},
+            },
+        )
+        assert response.status_code == 422
+
+    assert client.get("/rooms/quick_join/stats").json()["depth"] == 0
+    assert client.get("/rooms/locate/Alice").status_code == 404
+    assert client.get("/rooms/").json()["rooms"] == []
+
+
+def test_quick_join_leave(client: TestClient) -> None:
+    client.post("/rooms/quick_join", params={"player": "Alice"})
+
+    response = client.get("/rooms/quick_join/stats")
+    assert response.json()["depth"] == 1
+
+    response = client.post("/rooms/quick_join/leave", params={"player": "Alice"})
+    assert response.status_code == 204
+
+    response = client.post("/rooms/quick_join/leave", params={"player": "Alice"})
+    assert response.status_code == 404
+    assert client.get("/rooms/quick_join/stats").json()["depth"] == 0
+
+
+def test_get_leaderboard(
+    client: TestClient, room: dict, host: dict, player_1: dict
+) -> None:
+    res = client.get(f"/rooms/{room['id']}/leaderboard")
+    assert res.status_code == 404
+
+    client.post(f"/rooms/add/{room['id']}", params=player_1)
+    client.post(f"/rooms/start/{room['id']}")
+    client.post(f"/rooms/answer/{room['id']}", params=player_1 | {"answer": 3})
+
+    res = client.get(f"/rooms/{room['id']}/leaderboard", params={"k": 1})
+    assert res.json() == [{"rank": 1, "name": "Alice", "score": 1}]
+
+    res = client.get(f"/rooms/{room['id']}/leaderboard", params=host | {"k": 1})
+    assert [standing["name"] for standing in res.json()] == ["Alice", "Host"]
+
+
+def test_update_settings_invalid(client: TestClient, room: dict) -> None:
+    res = client.post(f"/rooms/update_settings/{room['id']}", json={"operations": []})
+
+    assert res.status_code == 422
+
+
+def test_worker_partition(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.delenv("NUMRACER_BACKPLANE_DIR", raising=False)
+    assert rooms.worker_partition() == {}
+
+    monkeypatch.setenv("NUMRACER_BACKPLANE_DIR", str(tmp_path))
+    monkeypatch.delenv("NUMRACER_WORKERS", raising=False)
+    with pytest.raises(RuntimeError):
+        rooms.worker_partition()
+
+    # Workers with the same environment still claim distinct slots.
+    monkeypatch.setenv("NUMRACER_WORKERS", "2")
+    assert rooms.worker_partition() == {"worker_id": 0, "workers": 2}
+    assert rooms.worker_partition() == {"worker_id": 1, "workers": 2}
+    with pytest.raises(RuntimeError):
+        rooms.worker_partition()
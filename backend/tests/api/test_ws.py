@@ -0,0 +1,285 @@
+from collections.abc import Iterator
+
+import pytest
+from app import main
+from app.main import app
+from app.models.manager import Manager
+from app.ws.codec import BINARY, BINARY_SUBPROTOCOL, JSON_SUBPROTOCOL
+from app.ws.connection import ROOM_FULL
+from app.ws.schemas import MessageType, WebSocketMessage
+from app.ws.sync import apply_patch
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def room_id(client: TestClient) -> str:
+    room_id = client.post("/rooms/", params={"host": "Host"}).json()
+
+    client.post(
+        f"/rooms/update_settings/{room_id}",
+        json={
+            "operations": ["+"],
+            "add_bounds": {"bounds_1": [1, 1], "bounds_2": [2, 2]},
+        },
+    )
+
+    return room_id
+
+
+def answer(value: object) -> dict:
+    return {"type": "answer", "payload": {"answer": value}}
+
+
+def test_answer_correct(client: TestClient, room_id: str) -> None:
+    client.post(f"/rooms/start/{room_id}")
+
+    with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+        ws.send_json(answer(3))
+        reply = ws.receive_json()
+
+    assert reply["type"] == "verdict"
+    assert reply["payload"]["correct"] is True
+    assert reply["payload"]["problem"]["result"] == 3
+    assert client.get(f"/rooms/{room_id}").json()["players"]["Host"]["score"] == 1
+
+
+def test_answer_incorrect(client: TestClient, room_id: str) -> None:
+    client.post(f"/rooms/start/{room_id}")
+
+    with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+        ws.send_json(answer(0))
+        reply = ws.receive_json()
+
+    assert reply["type"] == "verdict"
+    assert reply["payload"]["correct"] is False
+
+
+def test_answer_nonexistent_match(client: TestClient, room_id: str) -> None:
+    with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+        ws.send_json(answer(3))
+        reply = ws.receive_json()
+
+    assert reply["type"] == "error"
+
+
+def test_answer_error_same_socket(client: TestClient, room_id: str) -> None:
+    with client.websocket_connect(f"/ws/{room_id}/Host") as tab:
+        with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+            ws.send_json(answer(3))
+            assert ws.receive_json()["type"] == "error"
+
+            ws.send_json({"type": "update", "payload": {}})
+            assert ws.receive_json()["type"] == "update"
+
+        # The other tab sees the relayed UPDATE but not the ERROR.
+        assert tab.receive_json()["type"] == "update"
+
+
+def test_answer_top_up(
+    client: TestClient, room_id: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    topped_up: list[str] = []
+    monkeypatch.setattr(
+        Manager, "top_up", lambda self, room_id: topped_up.append(room_id)
+    )
+    client.post(f"/rooms/start/{room_id}")
+
+    with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+        ws.send_json(answer(0))
+        assert ws.receive_json()["payload"]["correct"] is False
+        ws.send_json(answer(3))
+        assert ws.receive_json()["payload"]["correct"] is True
+
+        # The top-up runs in the background, by the time the PING is handled.
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json()["type"] == "pong"
+
+    assert topped_up == [room_id]
+
+
+def test_answer_malformed(client: TestClient, room_id: str) -> None:
+    client.post(f"/rooms/start/{room_id}")
+
+    with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+        ws.send_json(answer("3"))
+        assert ws.receive_json()["type"] == "error"
+
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+
+
+def test_answer_broadcasts_scores(client: TestClient, room_id: str) -> None:
+    client.post(f"/rooms/add/{room_id}", params={"player": "Alice"})
+    client.post(f"/rooms/start/{room_id}")
+
+    with client.websocket_connect(f"/ws/{room_id}/Alice") as viewer:
+        with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+            ws.send_json(answer(3))
+            assert ws.receive_json()["payload"]["score"] == 1
+
+        message = viewer.receive_json()
+
+    assert message["type"] == "scores"
+    assert message["payload"] == {"scores": {"Host": 1}}
+
+
+def test_http_answer_broadcasts_scores(client: TestClient, room_id: str) -> None:
+    client.post(f"/rooms/start/{room_id}")
+
+    with client.websocket_connect(f"/ws/{room_id}/Host") as viewer:
+        res = client.post(
+            f"/rooms/answer/{room_id}", params={"player": "Host", "answer": 3}
+        )
+        assert res.json() is True
+
+        message = viewer.receive_json()
+
+    assert message["type"] == "scores"
+    assert message["payload"] == {"scores": {"Host": 1}}
+
+
+def test_relay(client: TestClient, room_id: str) -> None:
+    with client.websocket_connect(f"/ws/{room_id}/Alice") as viewer:
+        with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+            ws.send_json(
+                {
+                    "type": "update",
+                    "room_id": "other",
+                    "player": "Alice",
+                    "payload": {"n": 1},
+                }
+            )
+            assert ws.receive_json()["player"] == "Host"
+
+        message = viewer.receive_json()
+
+    assert message == {
+        "type": "update",
+        "room_id": room_id,
+        "player": "Host",
+        "payload": {"n": 1},
+    }
+
+
+@pytest.mark.parametrize("message_type", ["verdict", "scores", "snapshot", "patch"])
+def test_server_types_rejected(
+    client: TestClient, room_id: str, message_type: str
+) -> None:
+    with client.websocket_connect(f"/ws/{room_id}/Alice") as viewer:
+        with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+            ws.send_json({"type": message_type, "payload": {"seq": 10**6}})
+            assert ws.receive_json()["type"] == "error"
+
+            ws.send_json({"type": "update", "payload": {}})
+            assert ws.receive_json()["type"] == "update"
+
+        # The viewer only sees the relayed UPDATE.
+        assert viewer.receive_json()["type"] == "update"
+
+
+def test_binary_subprotocol(client: TestClient, room_id: str) -> None:
+    client.post(f"/rooms/start/{room_id}")
+    answer_3 = WebSocketMessage(type=MessageType.ANSWER, payload={"answer": 3})
+
+    with client.websocket_connect(
+        f"/ws/{room_id}/Host", subprotocols=[JSON_SUBPROTOCOL, BINARY_SUBPROTOCOL]
+    ) as ws:
+        assert ws.accepted_subprotocol == BINARY_SUBPROTOCOL
+
+        ws.send_bytes(BINARY.encode(answer_3))
+        reply = BINARY.decode(ws.receive_bytes())
+
+        ws.send_text("not binary")
+        error = BINARY.decode(ws.receive_bytes())
+
+    assert reply.type == MessageType.VERDICT
+    assert reply.payload["correct"] is True
+    assert reply.payload["problem"]["result"] == 3
+    assert error.type == MessageType.ERROR
+
+
+def test_unknown_subprotocol(client: TestClient, room_id: str) -> None:
+    with client.websocket_connect(f"/ws/{room_id}/Host", subprotocols=["v9"]) as ws:
+        assert ws.accepted_subprotocol is None
+        ws.send_json(answer(3))
+        assert ws.receive_json()["type"] == "error"
+
+
+def test_state_sync(client: TestClient, room_id: str) -> None:
+    with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+        ws.send_json({"type": "sync"})
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+
+        client.post(f"/rooms/add/{room_id}", params={"player": "Alice"})
+        patch = ws.receive_json()
+
+    assert patch["type"] == "patch"
+    assert patch["payload"]["seq"] == snapshot["payload"]["seq"] + 1
+
+    state = apply_patch(snapshot["payload"]["state"], patch["payload"]["ops"])
+    assert state == client.get(f"/rooms/{room_id}").json()
+
+
+def test_state_sync_resume(client: TestClient, room_id: str) -> None:
+    with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+        ws.send_json({"type": "sync"})
+        snapshot = ws.receive_json()["payload"]
+
+    client.post(f"/rooms/add/{room_id}", params={"player": "Alice"})
+
+    with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+        ws.send_json(
+            {
+                "type": "sync",
+                "payload": {"epoch": snapshot["epoch"], "seq": snapshot["seq"]},
+            }
+        )
+        patch = ws.receive_json()
+
+    assert patch["type"] == "patch"
+    assert patch["payload"]["seq"] == snapshot["seq"] + 1
+
+    state = apply_patch(snapshot["state"], patch["payload"]["ops"])
+    assert state == client.get(f"/rooms/{room_id}").json()
+
+
+def test_verdict_to_all_tabs(client: TestClient, room_id: str) -> None:
+    client.post(f"/rooms/add/{room_id}", params={"player": "Alice"})
+    client.post(f"/rooms/start/{room_id}")
+
+    with client.websocket_connect(f"/ws/{room_id}/Alice") as other:
+        with client.websocket_connect(f"/ws/{room_id}/Host") as tab:
+            with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+                ws.send_json(answer(3))
+                assert ws.receive_json()["type"] == "verdict"
+                assert tab.receive_json()["type"] == "verdict"
+
+        assert other.receive_json()["type"] == "scores"
+
+
+def test_ping(client: TestClient, room_id: str) -> None:
+    with client.websocket_connect(f"/ws/{room_id}/Host") as ws:
+        ws.send_json({"type": "pong"})
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json()["type"] == "pong"
+
+
+def test_room_full(
+    client: TestClient, room_id: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(main.ws_manager, "max_per_room", 1)
+
+    with client.websocket_connect(f"/ws/{room_id}/Host"):
+        with client.websocket_connect(f"/ws/{room_id}/Alice") as ws:
+            with pytest.raises(WebSocketDisconnect) as error:
+                ws.receive_json()
+
+    assert error.value.code == ROOM_FULL
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from app.models.actor import ActorSystem, RoomActor
+from app.models.manager import Manager
+from app.models.player import Player
+
+
+@pytest.fixture
+def manager() -> Manager:
+    return Manager()
+
+
+@pytest.fixture
+def actors(manager: Manager) -> ActorSystem:
+    return ActorSystem(manager)
+
+
+def test_call_in_order() -> None:
+    async def run() -> list[int]:
+        actor = RoomActor("test")
+        applied: list[int] = []
+        await asyncio.gather(*(actor.call(applied.append, i) for i in range(100)))
+        actor.stop()
+        return applied
+
+    assert asyncio.run(run()) == list(range(100))
+
+
+def test_call_exception() -> None:
+    async def run() -> None:
+        actor = RoomActor("test")
+        with pytest.raises(ZeroDivisionError):
+            await actor.call(lambda: 1 / 0)
+
+        assert await actor.call(lambda: 1) == 1
+        actor.stop()
+
+    asyncio.run(run())
+
+
+def test_restart_on_new_loop() -> None:
+    actor = RoomActor("test")
+
+    assert asyncio.run(actor.call(lambda: 1)) == 1
+    assert asyncio.run(actor.call(lambda: 2)) == 2
+
+
+def test_rooms_in_parallel(manager: Manager, actors: ActorSystem) -> None:
+    room_ids = [str(manager.create_room(Player(name=f"Host {i}"))) for i in range(10)]
+
+    async def run() -> None:
+        await asyncio.gather(
+            *(
+                actors.call(
+                    room_id, manager.add_player, room_id, Player(name=room_id + name)
+                )
+                for room_id in room_ids
+                for name in ("Alice", "Bob", "Carol")
+            )
+        )
+
+    asyncio.run(run())
+
+    assert len(actors.actors) == 10
+    assert all(len(manager.rooms[room_id].players) == 4 for room_id in room_ids)
+
+
+def test_stop_on_delete(manager: Manager, actors: ActorSystem) -> None:
+    room_id = manager.create_room(Player(name="Host"))
+
+    assert asyncio.run(actors.call(room_id, manager.delete_room, room_id))
+    assert room_id not in actors.actors
+
+
+def test_nonexistent_room(manager: Manager, actors: ActorSystem) -> None:
+    assert asyncio.run(actors.call("nonexistent", manager.start_match, "x")) is False
+    assert "nonexistent" not in actors.actors
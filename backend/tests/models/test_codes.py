@@ -0,0 +1,65 @@
+import pytest
+from app.models.codes import ALPHABET, RoomCodeAllocator
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def allocator(clock: Clock) -> RoomCodeAllocator:
+    return RoomCodeAllocator(length=2, quarantine=10, clock=clock)
+
+
+def test_allocate_unique(allocator: RoomCodeAllocator) -> None:
+    codes = [allocator.allocate() for _ in range(allocator.size)]
+
+    assert len(set(codes)) == allocator.size
+    assert all(len(code) == 2 and set(code) <= set(ALPHABET) for code in codes)
+
+    with pytest.raises(RuntimeError):
+        allocator.allocate()
+
+
+def test_release_quarantine(allocator: RoomCodeAllocator, clock: Clock) -> None:
+    codes = [allocator.allocate() for _ in range(allocator.size)]
+
+    assert allocator.release(codes[0]) is True
+    assert allocator.release(codes[0]) is False
+
+    with pytest.raises(RuntimeError):
+        allocator.allocate()
+
+    clock.now = 10
+    assert allocator.allocate() == codes[0]
+
+
+def test_release_unknown(allocator: RoomCodeAllocator) -> None:
+    assert allocator.release("ZZ") is False
+
+
+def test_workers_disjoint(clock: Clock) -> None:
+    workers = [
+        RoomCodeAllocator(length=2, worker_id=i, workers=3, clock=clock)
+        for i in range(3)
+    ]
+    codes = [
+        {worker.allocate() for _ in range(len(range(i, worker.size, 3)))}
+        for i, worker in enumerate(workers)
+    ]
+
+    assert sum(len(c) for c in codes) == len(set.union(*codes)) == len(ALPHABET) ** 2
+
+
+def test_invalid_worker() -> None:
+    with pytest.raises(ValueError):
+        RoomCodeAllocator(worker_id=2, workers=2)
@@ -0,0 +1,49 @@
+import pytest
+from app.models.deck import ProblemDeck
+from app.models.problem import OpBounds, Operation, ProblemSampler
+
+
+@pytest.fixture
+def deck() -> ProblemDeck:
+    return ProblemDeck(
+        seed=42,
+        sampler=ProblemSampler(
+            tuple(Operation),
+            OpBounds(bounds_1=(2, 100), bounds_2=(2, 100)),
+            OpBounds(bounds_1=(2, 12), bounds_2=(2, 100)),
+        ),
+        batch_size=8,
+        low_water=4,
+    )
+
+
+def test_get_extends(deck: ProblemDeck) -> None:
+    assert len(deck) == 0
+
+    deck.get(0)
+    assert len(deck) == 8
+
+    deck.get(20)
+    assert len(deck) == 24
+
+
+def test_get_stable(deck: ProblemDeck) -> None:
+    problems = [deck.get(i) for i in range(20)]
+
+    assert [deck.get(i) for i in range(20)] == problems
+
+
+def test_top_up(deck: ProblemDeck) -> None:
+    deck.get(0)
+
+    assert deck.top_up(3) is False
+    assert len(deck) == 8
+
+    assert deck.top_up(5) is True
+    assert len(deck) == 16
+
+
+def test_seed_addressable(deck: ProblemDeck) -> None:
+    replay = ProblemDeck(seed=deck.seed, sampler=deck.sampler)
+
+    assert [deck.get(i) for i in range(20)] == [replay.get(i) for i in range(20)]
@@ -0,0 +1,66 @@
+import pytest
+from app.models.index import RoomIndex
+from app.models.match import MatchSettings
+from app.models.player import Player
+from app.models.problem import Operation
+from app.models.room import Room, RoomStatus
+
+
+@pytest.fixture
+def index() -> RoomIndex:
+    return RoomIndex()
+
+
+def make_room(room_id: str, players: int) -> Room:
+    names = [f"{room_id}-{i}" for i in range(players)]
+    return Room(
+        id=room_id,
+        host=Player(name=names[0]),
+        players={name: Player(name=name) for name in names},
+    )
+
+
+def test_query_max_players(index: RoomIndex) -> None:
+    for count in range(1, 12):
+        index.update(count, make_room(str(count), count))
+
+    assert list(index.query(max_players=7)) == list(range(1, 8))
+    assert list(index.query(max_players=0)) == []
+
+
+def test_query_cursor(index: RoomIndex) -> None:
+    for count in range(1, 12):
+        index.update(count, make_room(str(count), count))
+
+    assert list(index.query(cursor=3, max_players=7)) == [4, 5, 6, 7]
+    assert list(index.query(cursor=8, status=RoomStatus.WAITING)) == [9, 10, 11]
+    assert list(index.query(cursor=11, status=RoomStatus.WAITING)) == []
+
+
+def test_query_combined(index: RoomIndex) -> None:
+    rooms = [make_room(str(i), i + 1) for i in range(4)]
+    rooms[1].update_settings(MatchSettings(operations=(Operation.MUL,)))
+    rooms[3].update_settings(MatchSettings(operations=(Operation.MUL,)))
+    rooms[3].start_match()
+    for serial, room in enumerate(rooms):
+        index.update(serial, room)
+
+    digest = rooms[1].match_settings.digest
+    assert list(index.query(settings_digest=digest)) == [1, 3]
+    assert list(index.query(status=RoomStatus.WAITING, settings_digest=digest)) == [1]
+    assert list(index.query(host="0-0")) == [0]
+    assert index.query() is None
+
+
+def test_update_and_remove(index: RoomIndex) -> None:
+    room = make_room("a", 1)
+    index.update(1, room)
+    room.start_match()
+    index.update(1, room)
+
+    assert list(index.query(status=RoomStatus.WAITING)) == []
+    assert list(index.query(status=RoomStatus.IN_MATCH)) == [1]
+
+    index.remove(1)
+    assert list(index.query(status=RoomStatus.IN_MATCH)) == []
+    assert index.by_status == {}
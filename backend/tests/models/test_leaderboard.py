@@ -0,0 +1,66 @@
+import pytest
+from app.models.leaderboard import Leaderboard, Standing
+from app.models.player import Player
+
+
+@pytest.fixture
+def players() -> list[Player]:
+    return [Player(name=name) for name in "ABCDE"]
+
+
+@pytest.fixture
+def leaderboard(players: list[Player]) -> Leaderboard:
+    return Leaderboard(players)
+
+
+def score(leaderboard: Leaderboard, slot: int, points: int = 1) -> None:
+    player = leaderboard.players[slot]
+    old = player.score
+    player.score += points
+    leaderboard.update(slot, old)
+
+
+def test_initial(leaderboard: Leaderboard) -> None:
+    assert len(leaderboard) == 5
+    assert leaderboard.leader.name == "A"
+    assert [leaderboard.rank_of(name) for name in "ABCDE"] == [1, 2, 3, 4, 5]
+    assert leaderboard.rank_of("Z") is None
+
+
+def test_update(leaderboard: Leaderboard) -> None:
+    score(leaderboard, 3, 2)
+    score(leaderboard, 1)
+
+    assert leaderboard.leader.name == "D"
+    assert leaderboard.rank_of("D") == 1
+    assert leaderboard.rank_of("B") == 2
+    assert leaderboard.rank_of("A") == 3
+
+    score(leaderboard, 1)
+    assert leaderboard.rank_of("B") == 1
+    assert leaderboard.rank_of("D") == 2
+
+
+def test_top(leaderboard: Leaderboard) -> None:
+    score(leaderboard, 4, 3)
+    score(leaderboard, 2)
+
+    assert leaderboard.top(2) == [
+        Standing(rank=1, name="E", score=3),
+        Standing(rank=2, name="C", score=1),
+    ]
+    assert len(leaderboard.top(10)) == 5
+
+
+def test_neighbors(leaderboard: Leaderboard) -> None:
+    assert [s.name for s in leaderboard.neighbors("C")] == ["B", "C", "D"]
+    assert [s.name for s in leaderboard.neighbors("A", 2)] == ["A", "B", "C"]
+    assert [s.rank for s in leaderboard.neighbors("E")] == [4, 5]
+    assert leaderboard.neighbors("Z") == []
+
+
+def test_empty() -> None:
+    leaderboard = Leaderboard([])
+
+    assert leaderboard.leader is None
+    assert leaderboard.top(3) == []
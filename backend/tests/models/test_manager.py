@@ -3,7 +3,7 @@ from app.models.manager import Manager
 from app.models.match import MatchSettings
 from app.models.player import Player
 from app.models.problem import OpBounds, Operation
-from app.models.room import Room
+from app.models.room import Room, RoomStatus
 
 
 @pytest.fixture
@@ -17,8 +17,13 @@ def room(manager: Manager, host: Player) -> Room:
     rm = manager.get_room(room_id)
     assert rm is not None
 
-    rm.match_settings.operations = [Operation.ADD]
-    rm.match_settings.add_bounds = OpBounds(bounds_1=(1, 1), bounds_2=(2, 2))
+    manager.update_settings(
+        room_id,
+        MatchSettings(
+            operations=(Operation.ADD,),
+            add_bounds=OpBounds(bounds_1=(1, 1), bounds_2=(2, 2)),
+        ),
+    )
 
     return rm
 
@@ -62,6 +67,21 @@ def test_create_room(manager: Manager, host: Player) -> None:
     assert manager.rooms[room_id].players == {host.name: host}
 
 
+def test_create_room_partitioned() -> None:
+    first = Manager(worker_id=0, workers=2)
+    second = Manager(worker_id=1, workers=2)
+
+    codes = [first.create_room(Player(name=f"a{i}")) for i in range(50)]
+    others = [second.create_room(Player(name=f"b{i}")) for i in range(50)]
+
+    assert set(codes).isdisjoint(others)
+
+
+def test_invalid_partition() -> None:
+    with pytest.raises(ValueError):
+        Manager(worker_id=2, workers=2)
+
+
 def test_get_rooms(manager: Manager, player_1: Player, player_2: Player) -> None:
     room1 = manager.rooms[manager.create_room(player_1)]
     room2 = manager.rooms[manager.create_room(player_2)]
@@ -192,3 +212,87 @@ def test_handle_answer_nonexistent_player(
 ) -> None:
     manager.start_match(room.id)
     assert manager.handle_answer(room.id, player_1, 0) is None
+
+
+def test_create_room_after_delete(
+    manager: Manager, host: Player, player_1: Player, player_2: Player
+) -> None:
+    room_1 = manager.create_room(host)
+    room_2 = manager.create_room(player_1)
+    manager.delete_room(room_1)
+    room_3 = manager.create_room(player_2)
+
+    assert room_3 not in (room_1, room_2)
+    assert manager.rooms[room_2].host == player_1
+
+
+def test_list_rooms(manager: Manager, player_1: Player, player_2: Player) -> None:
+    room_ids = [manager.create_room(Player(name=str(i))) for i in range(5)]
+    manager.delete_room(room_ids[1])
+
+    rooms, cursor = manager.list_rooms(limit=2)
+    assert [room.id for room in rooms] == [room_ids[0], room_ids[2]]
+
+    rooms, cursor = manager.list_rooms(cursor=cursor, limit=2)
+    assert [room.id for room in rooms] == room_ids[3:]
+    assert cursor is None
+
+
+def test_list_rooms_filters(manager: Manager, room: Room, player_1: Player) -> None:
+    other = manager.create_room(player_1)
+    manager.add_player(other, Player(name="Carol"))
+    manager.start_match(room.id)
+
+    rooms, _ = manager.list_rooms(status=RoomStatus.WAITING)
+    assert [r.id for r in rooms] == [other]
+
+    rooms, _ = manager.list_rooms(max_players=1)
+    assert [r.id for r in rooms] == [room.id]
+
+    rooms, _ = manager.list_rooms(settings_digest=room.match_settings.digest)
+    assert [r.id for r in rooms] == [room.id]
+
+
+def test_list_rooms_by_host(manager: Manager, room: Room, player_1: Player) -> None:
+    manager.create_room(player_1)
+
+    rooms, _ = manager.list_rooms(host=player_1.name)
+    assert [r.host for r in rooms] == [player_1]
+
+
+def test_list_rooms_filtered_pages(manager: Manager) -> None:
+    room_ids = [manager.create_room(Player(name=str(i))) for i in range(6)]
+    for room_id in room_ids[::2]:
+        manager.start_match(room_id)
+
+    rooms, cursor = manager.list_rooms(limit=2, status=RoomStatus.IN_MATCH)
+    assert [r.id for r in rooms] == [room_ids[0], room_ids[2]]
+
+    rooms, cursor = manager.list_rooms(cursor, limit=2, status=RoomStatus.IN_MATCH)
+    assert [r.id for r in rooms] == [room_ids[4]]
+    assert cursor is None
+
+
+def test_locate(manager: Manager, room: Room, host: Player, player_1: Player) -> None:
+    assert manager.locate(host.name) == room.id
+    assert manager.locate(player_1.name) is None
+
+    manager.add_player(room.id, player_1)
+    assert manager.locate(player_1.name) == room.id
+
+    manager.remove_player(room.id, player_1)
+    assert manager.locate(player_1.name) is None
+
+    manager.delete_room(room.id)
+    assert manager.locate(host.name) is None
+
+
+def test_single_room_membership(
+    manager: Manager, room: Room, host: Player, player_1: Player
+) -> None:
+    assert manager.create_room(host) is None
+
+    other = manager.create_room(player_1)
+    assert other is not None
+    assert manager.add_player(other, host) is False
+    assert host.name not in manager.rooms[other].players
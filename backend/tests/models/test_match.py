@@ -1,7 +1,14 @@
 import pytest
-from app.models.match import Match, MatchResult, MatchSettings
+from app.models.match import (
+    Match,
+    MatchResult,
+    MatchSettings,
+    get_sampler,
+    sampler_cache_info,
+)
 from app.models.player import Player
 from app.models.problem import OpBounds, Operation, Problem
+from pydantic import ValidationError
 
 
 @pytest.fixture
@@ -30,7 +37,7 @@ def test_start_match(match: Match, problem: Problem) -> None:
 
 
 def test_start_match_bad_settings(match: Match) -> None:
-    match.settings.operations = []
+    match.settings = match.settings.model_copy(update={"operations": ()})
 
     with pytest.raises(ValueError):
         match.start_match()
@@ -58,6 +65,29 @@ def test_results(match: Match) -> None:
     }
 
 
+def test_results_no_players() -> None:
+    match = Match()
+    match.start_match()
+    match.end_match()
+
+    assert match.result is not None
+    assert match.result.winner is None
+    assert match.result.final_scores == {}
+
+
+def test_leaderboard(match: Match) -> None:
+    match.start_match()
+    assert match.leaderboard.leader.name == "Alice"
+
+    match.handle_answer(match.players["Bob"], 3)
+
+    assert match.leaderboard.leader.name == "Bob"
+    assert match.leaderboard.rank_of("Alice") == 2
+
+    match.end_match()
+    assert match.result.winner.name == "Bob"
+
+
 def test_handle_answer_correct(match: Match, problem: Problem) -> None:
     match.start_match()
 
@@ -89,3 +119,102 @@ def test_handle_answer_nonexistent_player(match: Match) -> None:
 
     nonexistent_player = Player(name="nonexistent")
     assert match.handle_answer(nonexistent_player, 5) is None
+
+
+def test_shared_deck(match: Match) -> None:
+    match.settings = match.settings.model_copy(
+        update={"add_bounds": OpBounds(bounds_1=(1, 100), bounds_2=(1, 100))}
+    )
+    match.start_match()
+
+    alice = match.players["Alice"]
+    bob = match.players["Bob"]
+    assert alice.current_problem == bob.current_problem
+
+    for _ in range(5):
+        assert alice.current_problem is not None
+        assert match.handle_answer(alice, alice.current_problem.result) is True
+
+    assert alice.cursor == 5
+    assert bob.cursor == 0
+
+    for _ in range(5):
+        assert bob.current_problem is not None
+        assert match.handle_answer(bob, bob.current_problem.result) is True
+
+    assert bob.current_problem == alice.current_problem
+
+
+def test_problem_at(match: Match) -> None:
+    match.settings = match.settings.model_copy(
+        update={"add_bounds": OpBounds(bounds_1=(1, 100), bounds_2=(1, 100))}
+    )
+    match.start_match()
+
+    alice = match.players["Alice"]
+    for _ in range(3):
+        assert alice.current_problem is not None
+        match.handle_answer(alice, alice.current_problem.result)
+
+    assert match.problem_at(alice.cursor) == alice.current_problem
+
+
+def test_settings_frozen(match: Match) -> None:
+    with pytest.raises(ValidationError):
+        match.settings.duration = 60  # type: ignore[misc]
+
+
+def test_sampler_shared() -> None:
+    # Creating the settings compiles them, so later lookups are all hits.
+    settings = MatchSettings(operations=(Operation.MUL,), duration=4321)
+    info = sampler_cache_info()
+
+    sampler = get_sampler(settings)
+    assert get_sampler(settings.model_copy()) is sampler
+    assert sampler_cache_info().hits == info.hits + 2
+    assert sampler_cache_info().misses == info.misses
+
+
+def test_answer_slot(match: Match) -> None:
+    assert match.slot_of("Alice") is None
+
+    match.start_match()
+    slot = match.slot_of("Alice")
+    assert slot is not None
+    assert match.slot_of("nonexistent") is None
+
+    assert match.answer_slot(slot, 0) is False
+    assert match.answer_slot(slot, 3) is True
+
+    alice = match.players["Alice"]
+    assert alice.score == 1
+    assert alice.cursor == 1
+    assert alice.current_problem is match.problem_at(1)
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {"operations": ()},
+        {"add_bounds": OpBounds(bounds_1=(5, 1), bounds_2=(1, 5))},
+        {
+            "operations": (Operation.DIV,),
+            "mul_bounds": OpBounds(bounds_1=(0, 0), bounds_2=(1, 5)),
+        },
+        {"add_bounds": OpBounds(bounds_1=(0, 10**12), bounds_2=(0, 10**12))},
+        {
+            "operations": (Operation.MUL,),
+            "mul_bounds": OpBounds(bounds_1=(1, 4 * 10**9), bounds_2=(1, 4 * 10**9)),
+        },
+    ],
+)
+def test_settings_invalid(settings: dict) -> None:
+    with pytest.raises(ValueError):
+        MatchSettings(**settings)
+
+
+def test_seed_not_serialized(match: Match) -> None:
+    match.start_match()
+
+    assert "seed" not in match.model_dump()
+    assert b"seed" not in match.model_dump_json().encode()
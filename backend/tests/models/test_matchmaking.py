@@ -0,0 +1,155 @@
+import pytest
+from app.models.manager import Manager
+from app.models.match import MatchSettings
+from app.models.matchmaking import Matchmaker
+from app.models.player import Player
+from app.models.room import RoomStatus
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def manager() -> Manager:
+    return Manager()
+
+
+@pytest.fixture
+def matchmaker(manager: Manager, clock: Clock) -> Matchmaker:
+    return Matchmaker(manager, start_threshold=3, room_size=4, clock=clock)
+
+
+@pytest.fixture
+def settings() -> MatchSettings:
+    return MatchSettings(duration=60)
+
+
+def test_threshold(
+    matchmaker: Matchmaker, manager: Manager, settings: MatchSettings
+) -> None:
+    assert matchmaker.join(Player(name="A"), settings).queued
+    assert matchmaker.join(Player(name="B"), settings).queued
+    assert not manager.rooms
+
+    result = matchmaker.join(Player(name="C"), settings)
+    assert not result.queued
+    assert result.room_id is not None
+
+    room = manager.get_room(result.room_id)
+    assert set(room.players) == {"A", "B", "C"}
+    assert room.host.name == "A"
+    assert room.status is RoomStatus.IN_MATCH
+    assert room.match_settings == settings
+    assert all(manager.locate(name) == room.id for name in "ABC")
+    assert matchmaker.stats().depth == 0
+
+
+def test_groups_by_settings(
+    matchmaker: Matchmaker, manager: Manager, settings: MatchSettings
+) -> None:
+    other = MatchSettings(duration=30)
+
+    matchmaker.join(Player(name="A"), settings)
+    matchmaker.join(Player(name="B"), other)
+    matchmaker.join(Player(name="C"), settings)
+    matchmaker.join(Player(name="D"), other)
+
+    assert not manager.rooms
+    assert matchmaker.stats().groups == 2
+    assert matchmaker.stats().depth == 4
+
+
+def test_join_twice(matchmaker: Matchmaker, settings: MatchSettings) -> None:
+    matchmaker.join(Player(name="A"), settings)
+    matchmaker.join(Player(name="A"), settings)
+    assert matchmaker.stats().depth == 1
+
+    matchmaker.join(Player(name="A"), MatchSettings(duration=30))
+    assert matchmaker.stats().depth == 1
+    assert matchmaker.stats().groups == 1
+
+
+def test_join_in_room(
+    matchmaker: Matchmaker, manager: Manager, settings: MatchSettings
+) -> None:
+    manager.create_room(Player(name="A"))
+
+    assert matchmaker.join(Player(name="A"), settings) is None
+
+
+def test_leave(
+    matchmaker: Matchmaker, manager: Manager, settings: MatchSettings
+) -> None:
+    matchmaker.join(Player(name="A"), settings)
+    matchmaker.join(Player(name="B"), settings)
+
+    assert matchmaker.leave("A") is True
+    assert matchmaker.leave("A") is False
+
+    matchmaker.join(Player(name="C"), settings)
+    assert not manager.rooms
+
+    result = matchmaker.join(Player(name="D"), settings)
+    assert set(manager.get_room(result.room_id).players) == {"B", "C", "D"}
+
+
+def test_skips_players_in_room(
+    matchmaker: Matchmaker, manager: Manager, settings: MatchSettings
+) -> None:
+    matchmaker.join(Player(name="A"), settings)
+    matchmaker.join(Player(name="B"), settings)
+    manager.create_room(Player(name="A"))
+
+    assert matchmaker.join(Player(name="C"), settings).queued
+    assert len(manager.rooms) == 1
+    assert matchmaker.stats().depth == 2
+
+    result = matchmaker.join(Player(name="D"), settings)
+    assert set(manager.get_room(result.room_id).players) == {"B", "C", "D"}
+
+
+def test_stats(matchmaker: Matchmaker, clock: Clock, settings: MatchSettings) -> None:
+    assert matchmaker.stats().oldest_wait == 0.0
+
+    matchmaker.join(Player(name="A"), settings)
+    clock.now = 2.0
+    matchmaker.join(Player(name="B"), settings)
+    clock.now = 5.0
+
+    stats = matchmaker.stats()
+    assert stats.depth == 2
+    assert stats.oldest_wait == 5.0
+
+    matchmaker.join(Player(name="C"), settings)
+
+    stats = matchmaker.stats()
+    assert stats.depth == 0
+    assert stats.matched == 3
+    assert stats.max_wait == 5.0
+    assert stats.mean_wait == pytest.approx((5.0 + 3.0 + 0.0) / 3)
+
+
+def test_stats_groups(matchmaker: Matchmaker, clock: Clock) -> None:
+    matchmaker.join(Player(name="A"), MatchSettings(duration=30))
+    clock.now = 4.0
+    matchmaker.join(Player(name="B"), MatchSettings(duration=90))
+    clock.now = 10.0
+
+    stats = matchmaker.stats()
+    assert stats.groups == 2
+    assert stats.oldest_wait == 10.0
+
+
+def test_invalid_threshold(manager: Manager) -> None:
+    with pytest.raises(ValueError):
+        Matchmaker(manager, start_threshold=5, room_size=4)
@@ -1,5 +1,5 @@
 import pytest
-from app.models.problem import OpBounds, Operation, Problem
+from app.models.problem import OpBounds, Operation, Problem, ProblemTable
 
 A_LOWER = 11
 A_UPPER = 20
@@ -111,3 +111,120 @@ def test_potential_div_by_zero(add_bounds: OpBounds) -> None:
 
     problem = Problem.generate(Operation.DIV, add_bounds, mul_bounds)
     assert problem.num2 != 0
+
+
+def test_generate_batch(add_bounds: OpBounds, mul_bounds: OpBounds) -> None:
+    batch = Problem.generate_batch(1000, list(Operation), add_bounds, mul_bounds)
+
+    assert len(batch) == 1000
+    assert {problem.operation for problem in batch.to_problems()} == set(Operation)
+
+    for problem in batch.to_problems():
+        if problem.operation == Operation.ADD:
+            assert problem.result == problem.num1 + problem.num2
+        elif problem.operation == Operation.SUB:
+            assert problem.result == problem.num1 - problem.num2
+        elif problem.operation == Operation.MUL:
+            assert problem.result == problem.num1 * problem.num2
+        else:
+            assert problem.num2 != 0
+            assert problem.result == problem.num1 / problem.num2
+
+
+def test_generate_batch_single_operation(
+    add_bounds: OpBounds, mul_bounds: OpBounds
+) -> None:
+    batch = Problem.generate_batch(100, [Operation.SUB], add_bounds, mul_bounds)
+
+    assert batch[0].operation == Operation.SUB
+    assert all(A_LOWER <= n <= A_UPPER for n in batch.num2)
+    assert all(A_LOWER <= n <= A_UPPER for n in batch.result)
+
+
+def test_generate_batch_potential_div_by_zero(add_bounds: OpBounds) -> None:
+    mul_bounds = OpBounds(bounds_1=(-1, 1), bounds_2=(M_LOWER, M_UPPER))
+    batch = Problem.generate_batch(1000, [Operation.DIV], add_bounds, mul_bounds)
+
+    assert set(batch.num2.tolist()) == {-1, 1}
+
+
+def test_generate_batch_invalid(add_bounds: OpBounds, mul_bounds: OpBounds) -> None:
+    with pytest.raises(ValueError):
+        Problem.generate_batch(10, [], add_bounds, mul_bounds)
+
+    div_bounds = OpBounds(bounds_1=(0, 0), bounds_2=(M_LOWER, M_UPPER))
+    with pytest.raises(ValueError):
+        Problem.generate_batch(10, [Operation.DIV], add_bounds, div_bounds)
+
+
+def test_batch_seeded(add_bounds: OpBounds, mul_bounds: OpBounds) -> None:
+    batch = Problem.generate_batch(50, list(Operation), add_bounds, mul_bounds, 7)
+    again = Problem.generate_batch(50, list(Operation), add_bounds, mul_bounds, 7)
+    other = Problem.generate_batch(50, list(Operation), add_bounds, mul_bounds, 8)
+
+    assert batch.to_problems() == again.to_problems()
+    assert batch.to_problems() != other.to_problems()
+
+
+def test_at_matches_batch(add_bounds: OpBounds) -> None:
+    mul_bounds = OpBounds(bounds_1=(-3, 3), bounds_2=(M_LOWER, M_UPPER))
+    operations = list(Operation)
+    batch = Problem.generate_batch(
+        100, operations, add_bounds, mul_bounds, seed=2**63 + 5, start=1000
+    )
+
+    assert batch.to_problems() == [
+        Problem.at(2**63 + 5, 1000 + i, operations, add_bounds, mul_bounds)
+        for i in range(100)
+    ]
+
+
+def test_table_size() -> None:
+    bounds = OpBounds(bounds_1=(2, 12), bounds_2=(2, 100))
+
+    assert ProblemTable(Operation.MUL, bounds).size == 11 * 99
+    assert ProblemTable(Operation.DIV, bounds).size == 11 * 99
+
+    bounds = OpBounds(bounds_1=(-2, 2), bounds_2=(1, 3))
+    assert ProblemTable(Operation.DIV, bounds).size == 4 * 3
+
+
+def test_table_entries() -> None:
+    bounds = OpBounds(bounds_1=(-2, 2), bounds_2=(1, 3))
+    table = ProblemTable(Operation.DIV, bounds)
+    problems = [table[i] for i in range(table.size)]
+
+    assert len(set(problems)) == table.size
+    assert all(p.num2 != 0 and p.num1 / p.num2 == p.result for p in problems)
+    assert {p.num2 for p in problems} == {-2, -1, 1, 2}
+
+
+def test_table_interned(add_bounds: OpBounds, mul_bounds: OpBounds) -> None:
+    problem = Problem.generate(Operation.ADD, add_bounds, mul_bounds, 1, 0)
+
+    assert Problem.generate(Operation.ADD, add_bounds, mul_bounds, 1, 0) is problem
+
+    batch = Problem.generate_batch(10, [Operation.ADD], add_bounds, mul_bounds, 1)
+    assert batch[0] is problem
+
+
+@pytest.mark.parametrize(
+    "operation, bounds",
+    [
+        (Operation.MUL, OpBounds(bounds_1=(0, 4 * 10**9), bounds_2=(0, 4 * 10**9))),
+        (Operation.DIV, OpBounds(bounds_1=(1, 4 * 10**9), bounds_2=(-(4 * 10**9), 1))),
+        (Operation.ADD, OpBounds(bounds_1=(0, 2**62), bounds_2=(0, 2**62))),
+        (Operation.SUB, OpBounds(bounds_1=(0, 2**63), bounds_2=(0, 0))),
+        (Operation.ADD, OpBounds(bounds_1=(0, 10**12), bounds_2=(0, 10**12))),
+    ],
+)
+def test_table_int64_overflow(operation: Operation, bounds: OpBounds) -> None:
+    with pytest.raises(ValueError):
+        ProblemTable(operation, bounds)
+
+
+def test_table_int64_limit() -> None:
+    bounds = OpBounds(bounds_1=(1, 3 * 10**9), bounds_2=(1, 3 * 10**9))
+    batch = Problem.generate_batch(50, [Operation.MUL], bounds, bounds, seed=7)
+
+    assert batch.result.tolist() == [p.result for p in batch.to_problems()]
@@ -1,8 +1,11 @@
+import json
+
 import pytest
+from app.models.cache import STATS, SerializationStats
 from app.models.match import MatchSettings
 from app.models.player import Player
 from app.models.problem import OpBounds, Operation
-from app.models.room import Room
+from app.models.room import Room, RoomStatus
 
 
 @pytest.fixture
@@ -102,6 +105,19 @@ def test_start_match_in_progress(room: Room) -> None:
     assert room.current_match is not None
 
 
+def test_start_match_bad_settings(room: Room) -> None:
+    # Bypass validation, as settings built before it was added could.
+    room.match_settings = room.match_settings.model_copy(update={"operations": ()})
+    version = room.version
+
+    with pytest.raises(ValueError):
+        room.start_match()
+
+    assert room.current_match is None
+    assert room.status == RoomStatus.WAITING
+    assert room.version == version
+
+
 def test_end_match(room: Room) -> None:
     assert room.current_match is None
     assert room.start_match()
@@ -115,3 +131,51 @@ def test_end_match_nonexistent(room: Room) -> None:
     assert room.current_match is None
     assert not room.end_match()
     assert room.current_match is None
+
+
+def test_version(room: Room, player_1: Player, settings: MatchSettings) -> None:
+    versions = [room.version]
+
+    room.add_player(player_1)
+    versions.append(room.version)
+    room.update_settings(settings)
+    versions.append(room.version)
+    room.start_match()
+    versions.append(room.version)
+    room.end_match()
+    versions.append(room.version)
+    room.remove_player(player_1)
+    versions.append(room.version)
+
+    assert versions == sorted(set(versions))
+
+    assert not room.end_match()
+    assert room.version == versions[-1]
+
+
+def test_dump_json_cached(room: Room, player_1: Player) -> None:
+    stats = STATS.setdefault("Room", SerializationStats())
+    misses = stats.misses
+
+    payload = room.dump_json()
+    assert room.dump_json() is payload
+    assert json.loads(payload) == room.model_dump(mode="json")
+    assert stats.misses == misses + 1
+
+    room.add_player(player_1)
+    assert json.loads(room.dump_json())["players"].keys() == {"Host", "Alice"}
+    assert stats.misses == misses + 2
+
+
+def test_dump_json_score(room: Room) -> None:
+    room.start_match()
+    payload = room.dump_json()
+
+    assert room.current_match is not None
+    slot = room.current_match.slot_of("Host")
+    assert slot is not None
+    room.current_match.answer_slot(slot, room.current_match.problem_at(0).result)
+    room.touch()
+
+    assert json.loads(room.dump_json())["players"]["Host"]["score"] == 1
+    assert room.dump_json() is not payload
@@ -0,0 +1,114 @@
+import asyncio
+import socket
+from pathlib import Path
+
+import pytest
+from app.ws.backplane import MemoryBackplane, UnixSocketBackplane
+from app.ws.frames import Frame
+from app.ws.manager import WebSocketManager
+from app.ws.schemas import MessageType, WebSocketMessage
+
+from .test_manager import FakeWebSocket, settle, update
+
+
+def test_memory_backplane() -> None:
+    bus: list[MemoryBackplane] = []
+    workers = [WebSocketManager() for _ in range(3)]
+    for worker in workers:
+        worker.attach_backplane(MemoryBackplane(bus))
+
+    alice, bob, tab, carol = (FakeWebSocket() for _ in range(4))
+
+    async def run() -> None:
+        await workers[0].connect("room", alice, "Alice")
+        await workers[1].connect("room", bob, "Bob")
+        await workers[1].connect("room", tab, "Alice")
+        await workers[2].connect("other", carol, "Carol")
+
+        workers[0].broadcast("room", update(1))
+        await settle()
+        workers[1].send_to_player("room", "Alice", update(2))
+        await settle()
+
+    asyncio.run(run())
+    assert [message["payload"]["n"] for message in alice.sent] == [1, 2]
+    assert [message["payload"]["n"] for message in tab.sent] == [1, 2]
+    assert [message["payload"]["n"] for message in bob.sent] == [1]
+    assert carol.sent == []
+
+
+def test_scores_without_local_sockets() -> None:
+    bus: list[MemoryBackplane] = []
+    owner, other = WebSocketManager(), WebSocketManager()
+    owner.attach_backplane(MemoryBackplane(bus))
+    other.attach_backplane(MemoryBackplane(bus))
+    bob = FakeWebSocket()
+
+    async def run() -> None:
+        await other.connect("room", bob, "Bob")
+        owner.publish_score("room", "Alice", 1)
+        owner.flush()
+        await settle()
+
+    asyncio.run(run())
+    assert [message["payload"] for message in bob.sent] == [{"scores": {"Alice": 1}}]
+
+
+def test_memory_backplane_stop() -> None:
+    bus: list[MemoryBackplane] = []
+    backplane = MemoryBackplane(bus)
+
+    asyncio.run(backplane.stop())
+    assert bus == []
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_unix_socket_backplane(tmp_path: Path) -> None:
+    received: list[tuple[str, str | None, dict]] = []
+
+    def deliver(room_id: str, player: str | None, frame: Frame) -> None:
+        received.append((room_id, player, frame.message.model_dump()))
+
+    async def run() -> None:
+        sender = UnixSocketBackplane(str(tmp_path), name="a")
+        receiver = UnixSocketBackplane(str(tmp_path), name="b")
+        receiver.attach(deliver)
+        sender.attach(lambda *args: pytest.fail("delivered to the sender"))
+        await sender.start()
+        await receiver.start()
+
+        message = WebSocketMessage(
+            type=MessageType.SCORES, payload={"scores": {"Bób": 1}}
+        )
+        sender.publish("room", None, Frame(message))
+        sender.publish("room", "Bób", update(2))
+        sender.publish(
+            "room",
+            None,
+            Frame(
+                WebSocketMessage(
+                    type=MessageType.UPDATE, payload={"blob": "x" * (1 << 16)}
+                )
+            ),
+        )
+        await asyncio.sleep(0.05)
+
+        assert sender.dropped == 1
+        await sender.stop()
+        await receiver.stop()
+
+    asyncio.run(run())
+    assert received == [
+        (
+            "room",
+            None,
+            {
+                "type": "scores",
+                "room_id": None,
+                "player": None,
+                "payload": {"scores": {"Bób": 1}},
+            },
+        ),
+        ("room", "Bób", update(2).message.model_dump()),
+    ]
+    assert list(tmp_path.iterdir()) == []
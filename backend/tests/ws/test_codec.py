@@ -0,0 +1,83 @@
+import pytest
+from app.ws.codec import (
+    BINARY,
+    BINARY_SUBPROTOCOL,
+    JSON,
+    JSON_SUBPROTOCOL,
+    negotiate,
+)
+from app.ws.frames import Frame
+from app.ws.schemas import MessageType, WebSocketMessage
+
+VERDICT = WebSocketMessage(
+    type=MessageType.VERDICT,
+    payload={
+        "correct": True,
+        "score": 12,
+        "problem": {"num1": 7, "num2": 8, "operation": "*", "result": 56},
+    },
+)
+
+
+def test_negotiate() -> None:
+    assert negotiate([]) is JSON
+    assert negotiate(["other"]) is JSON
+    assert negotiate([JSON_SUBPROTOCOL, BINARY_SUBPROTOCOL]) is BINARY
+    assert negotiate([JSON_SUBPROTOCOL]) is JSON
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        WebSocketMessage(type=MessageType.ANSWER, payload={"answer": -42}),
+        VERDICT,
+        WebSocketMessage(
+            type=MessageType.VERDICT,
+            payload={"correct": False, "score": 0, "problem": None},
+        ),
+        WebSocketMessage(
+            type=MessageType.SCORES, payload={"scores": {"Alice": 3, "Bób": 1}}
+        ),
+    ],
+)
+def test_binary_round_trip(message: WebSocketMessage) -> None:
+    data = BINARY.encode(message)
+
+    assert len(data) < len(JSON.encode(message)) / 2
+    assert BINARY.decode(data) == message
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        WebSocketMessage(type=MessageType.UPDATE, room_id="ABCDE", payload={"a": 1}),
+        WebSocketMessage(type=MessageType.ANSWER, payload={"answer": "3"}),
+        WebSocketMessage(type=MessageType.ANSWER, payload={"answer": 1 << 40}),
+    ],
+)
+def test_binary_json_fallback(message: WebSocketMessage) -> None:
+    data = BINARY.encode(message)
+
+    assert data[0] == 0
+    assert BINARY.decode(data) == message
+
+
+@pytest.mark.parametrize("data", [b"", b"\x04\x01", b"\x63", b"\x00{", "text"])
+def test_binary_malformed(data: bytes | str) -> None:
+    with pytest.raises(ValueError):
+        BINARY.decode(data)
+
+
+def test_binary_ping() -> None:
+    ping = WebSocketMessage(type=MessageType.PING)
+
+    assert BINARY.encode(ping) == bytes([11])
+    assert BINARY.decode(BINARY.encode(ping)) == ping
+
+
+def test_frame_encodes_once_per_codec() -> None:
+    frame = Frame(VERDICT)
+
+    assert frame.encode(JSON) is frame.text
+    assert frame.encode(BINARY) is frame.encode(BINARY)
+    assert BINARY.decode(frame.encode(BINARY)) == VERDICT
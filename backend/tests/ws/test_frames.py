@@ -0,0 +1,42 @@
+from app.ws.frames import Frame, FrameCache
+from app.ws.schemas import MessageType, WebSocketMessage
+
+
+def message(n: int) -> WebSocketMessage:
+    return WebSocketMessage(type=MessageType.UPDATE, payload={"n": n})
+
+
+def test_frame_encodes_once() -> None:
+    frame = Frame(message(1))
+
+    assert frame.text == message(1).model_dump_json()
+    assert frame.text is frame.text
+
+
+def test_frame_cache() -> None:
+    cache = FrameCache(maxsize=2)
+    built: list[int] = []
+
+    def build(n: int):
+        def build_message() -> WebSocketMessage:
+            built.append(n)
+            return message(n)
+
+        return build_message
+
+    first = cache.get(("room", 1), build(1))
+    assert cache.get(("room", 1), build(1)) is first
+    assert built == [1]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.get(("room", 2), build(2))
+    cache.get(("room", 1), build(1))
+    cache.get(("room", 3), build(3))
+
+    assert len(cache) == 2
+    assert cache.get(("room", 1), build(1)) is first
+    cache.get(("room", 2), build(2))
+    assert built == [1, 2, 3, 2]
+
+    cache.discard(("room", 2))
+    assert len(cache) == 1
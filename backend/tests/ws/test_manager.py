@@ -0,0 +1,331 @@
+import asyncio
+import json
+
+import pytest
+from app.ws.connection import (
+    IDLE_TIMEOUT,
+    ROOM_FULL,
+    SERVER_FULL,
+    SLOW_CONSUMER,
+    Connection,
+    OverflowPolicy,
+)
+from app.ws.frames import Frame
+from app.ws.manager import WebSocketManager
+from app.ws.schemas import MessageType, WebSocketMessage
+
+
+class FakeWebSocket:
+    def __init__(self, stalled: bool = False) -> None:
+        self.scope: dict = {}
+        self.accepted = False
+        self.close_code: int | None = None
+        self.sent: list[dict] = []
+        self.texts: list[str] = []
+        self.stalled = stalled
+
+    async def accept(self, subprotocol: str | None = None) -> None:
+        self.accepted = True
+
+    async def send_text(self, data: str) -> None:
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.texts.append(data)
+        self.sent.append(json.loads(data))
+
+    async def close(self, code: int = 1000) -> None:
+        self.close_code = code
+
+
+@pytest.fixture
+def ws_manager() -> WebSocketManager:
+    return WebSocketManager()
+
+
+def update(n: int) -> Frame:
+    return Frame(WebSocketMessage(type=MessageType.UPDATE, payload={"n": n}))
+
+
+def scores(**values: int) -> Frame:
+    return Frame(WebSocketMessage(type=MessageType.SCORES, payload={"scores": values}))
+
+
+async def settle() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_connect_disconnect(ws_manager: WebSocketManager) -> None:
+    websocket = FakeWebSocket()
+
+    async def run() -> Connection:
+        connection = await ws_manager.connect("room", websocket, "Alice")
+        tab = await ws_manager.connect("room", FakeWebSocket(), "Alice")
+        assert ws_manager.rooms == {"room": {"Alice": {connection, tab}}}
+
+        ws_manager.disconnect("room", websocket)
+        ws_manager.disconnect("room", websocket)
+        assert ws_manager.rooms == {"room": {"Alice": {tab}}}
+
+        ws_manager.disconnect("room", tab.websocket)
+        return connection
+
+    connection = asyncio.run(run())
+    assert websocket.accepted
+    assert connection.closed
+    assert ws_manager.rooms == {}
+
+
+def test_broadcast(ws_manager: WebSocketManager) -> None:
+    sockets = [FakeWebSocket() for _ in range(3)]
+    message = WebSocketMessage(type=MessageType.UPDATE, payload={"n": 1})
+
+    async def run() -> None:
+        for player, websocket in zip("AAB", sockets):
+            await ws_manager.connect("room", websocket, player)
+        ws_manager.broadcast("room", message)
+        await settle()
+
+    asyncio.run(run())
+    assert all(websocket.sent == [message.model_dump()] for websocket in sockets)
+
+    # Every recipient sends the text encoded once for the first of them.
+    text = sockets[0].texts[0]
+    assert all(websocket.texts[0] is text for websocket in sockets)
+
+
+def test_send_to_player(ws_manager: WebSocketManager) -> None:
+    alice, tab, bob = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+
+    async def run() -> None:
+        await ws_manager.connect("room", alice, "Alice")
+        await ws_manager.connect("room", tab, "Alice")
+        await ws_manager.connect("room", bob, "Bob")
+
+        assert ws_manager.send_to_player("room", "Alice", update(1)) == 2
+        assert ws_manager.send_to_player("room", "Carol", update(2)) == 0
+        assert ws_manager.send_to_player("other", "Alice", update(3)) == 0
+        await settle()
+
+    asyncio.run(run())
+    assert alice.sent == tab.sent == [update(1).message.model_dump()]
+    assert bob.sent == []
+
+
+def test_broadcast_slow_client(ws_manager: WebSocketManager) -> None:
+    slow, fast = FakeWebSocket(stalled=True), FakeWebSocket()
+
+    async def run() -> None:
+        await ws_manager.connect("room", slow, "Slow")
+        await ws_manager.connect("room", fast, "Fast")
+        for n in range(50):
+            ws_manager.broadcast("room", update(n))
+        await settle()
+
+    asyncio.run(run())
+    assert [message["payload"]["n"] for message in fast.sent] == list(range(50))
+    assert slow.sent == []
+
+
+def test_overflow_drop_oldest() -> None:
+    async def run() -> list[dict]:
+        websocket = FakeWebSocket()
+        connection = Connection(websocket, "room", "Alice", maxsize=3)
+        for n in range(5):
+            assert connection.push(update(n))
+        assert connection.dropped == 2
+
+        connection.start()
+        await settle()
+        return websocket.sent
+
+    assert [message["payload"]["n"] for message in asyncio.run(run())] == [2, 3, 4]
+
+
+def test_overflow_keeps_replies(ws_manager: WebSocketManager) -> None:
+    websocket = FakeWebSocket()
+    verdict = WebSocketMessage(type=MessageType.VERDICT, payload={"correct": True})
+
+    async def run() -> Connection:
+        ws_manager.queue_size = 2
+        connection = await ws_manager.connect("room", websocket, "Alice")
+
+        # Nothing is written until the writer task first runs, in settle.
+        ws_manager.broadcast("room", update(0))
+        ws_manager.send_to_player("room", "Alice", verdict)
+        for n in range(1, 5):
+            ws_manager.broadcast("room", update(n))
+
+        await settle()
+        return connection
+
+    connection = asyncio.run(run())
+    assert connection.dropped == 3
+    assert [message["type"] for message in websocket.sent] == [
+        "verdict",
+        "update",
+        "update",
+    ]
+
+
+def test_overflow_replies_disconnect() -> None:
+    async def run() -> FakeWebSocket:
+        websocket = FakeWebSocket()
+        connection = Connection(websocket, "room", "Alice", maxsize=2)
+        assert connection.push(update(0), reply=True)
+        assert connection.push(update(1), reply=True)
+        assert connection.push(update(2), reply=True) is False
+
+        connection.start()
+        await settle()
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert websocket.sent == []
+    assert websocket.close_code == SLOW_CONSUMER
+
+
+def test_overflow_coalesce() -> None:
+    async def run() -> list[dict]:
+        websocket = FakeWebSocket()
+        connection = Connection(websocket, "room", "Alice", 2, OverflowPolicy.COALESCE)
+        connection.push(update(0))
+        connection.push(scores(Alice=1, Bob=1))
+        connection.push(scores(Alice=2))
+        connection.push(update(1))
+
+        connection.start()
+        await settle()
+        return websocket.sent
+
+    sent = asyncio.run(run())
+    assert sent[0]["payload"] == {"scores": {"Alice": 2, "Bob": 1}}
+    assert sent[1]["payload"] == {"n": 1}
+
+
+def test_overflow_disconnect() -> None:
+    async def run() -> FakeWebSocket:
+        websocket = FakeWebSocket()
+        connection = Connection(
+            websocket, "room", "Alice", 2, OverflowPolicy.DISCONNECT
+        )
+        connection.push(update(0))
+        connection.push(update(1))
+        assert connection.push(update(2)) is False
+        assert connection.push(update(3)) is False
+
+        connection.start()
+        await settle()
+        return websocket
+
+    websocket = asyncio.run(run())
+    assert websocket.sent == []
+    assert websocket.close_code == SLOW_CONSUMER
+
+
+def test_flush_coalesces_scores(ws_manager: WebSocketManager) -> None:
+    websocket, other = FakeWebSocket(), FakeWebSocket()
+
+    async def run() -> None:
+        await ws_manager.connect("room", websocket, "Alice")
+        await ws_manager.connect("other", other, "Bob")
+
+        for score in range(1, 51):
+            ws_manager.publish_score("room", "Alice", score)
+        ws_manager.publish_score("room", "Bob", 7)
+        ws_manager.publish_score("missing", "Carol", 1)
+
+        ws_manager.flush()
+        ws_manager.flush()
+        await settle()
+
+    asyncio.run(run())
+    assert other.sent == []
+    assert len(websocket.sent) == 1
+    assert websocket.sent[0]["type"] == "scores"
+    assert websocket.sent[0]["payload"] == {"scores": {"Alice": 50, "Bob": 7}}
+
+
+def test_tick(ws_manager: WebSocketManager) -> None:
+    ws_manager.tick_rate = 100
+    websocket = FakeWebSocket()
+
+    async def run() -> None:
+        await ws_manager.connect("room", websocket, "Alice")
+        ws_manager.start()
+
+        ws_manager.publish_score("room", "Alice", 1)
+        async with asyncio.timeout(1):
+            while not websocket.sent:
+                await asyncio.sleep(0.01)
+        assert len(websocket.sent) == 1
+
+        ws_manager.publish_score("room", "Alice", 2)
+        await ws_manager.stop()
+        await settle()
+
+    asyncio.run(run())
+    assert [m["payload"]["scores"]["Alice"] for m in websocket.sent] == [1, 2]
+
+
+def test_connection_limits() -> None:
+    ws_manager = WebSocketManager(max_per_room=2, max_connections=3)
+    sockets = [FakeWebSocket() for _ in range(5)]
+
+    async def run() -> list[Connection | None]:
+        return [
+            await ws_manager.connect(room_id, websocket, "Alice")
+            for room_id, websocket in zip(["a", "a", "a", "b", "c"], sockets)
+        ]
+
+    connections = asyncio.run(run())
+    assert [connection is not None for connection in connections] == [
+        True,
+        True,
+        False,
+        True,
+        False,
+    ]
+    assert sockets[2].close_code == ROOM_FULL
+    assert sockets[4].close_code == SERVER_FULL
+
+    ws_manager.disconnect("a", sockets[0])
+    assert asyncio.run(ws_manager.connect("a", FakeWebSocket(), "Bob")) is not None
+
+
+def test_reap(ws_manager: WebSocketManager) -> None:
+    ws_manager.idle_timeout = 30
+    idle, alive = FakeWebSocket(), FakeWebSocket()
+
+    async def run() -> int:
+        stale = await ws_manager.connect("room", idle, "Alice")
+        await ws_manager.connect("room", alive, "Bob")
+        stale.last_seen -= 31
+
+        reaped = ws_manager.reap()
+        ws_manager.broadcast("room", update(1))
+        await settle()
+
+        ws_manager.disconnect("room", idle)
+        return reaped
+
+    assert asyncio.run(run()) == 1
+    assert idle.close_code == IDLE_TIMEOUT
+    assert idle.sent == []
+    assert len(alive.sent) == 1
+    assert set(ws_manager.rooms["room"]) == {"Bob"}
+
+
+def test_heartbeat(ws_manager: WebSocketManager) -> None:
+    ws_manager.heartbeat_interval = 0.01
+    websocket = FakeWebSocket()
+
+    async def run() -> None:
+        await ws_manager.connect("room", websocket, "Alice")
+        ws_manager.start()
+        await asyncio.sleep(0.05)
+        await ws_manager.stop()
+
+    asyncio.run(run())
+    assert websocket.sent
+    assert all(message["type"] == "ping" for message in websocket.sent)
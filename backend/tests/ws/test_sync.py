@@ -0,0 +1,260 @@
+import copy
+from typing import Any
+
+import pytest
+from app.models.manager import Manager
+from app.models.player import Player
+from app.ws.connection import Connection
+from app.ws.frames import Frame, FrameCache
+from app.ws.sync import StateSync, apply_patch, diff
+
+
+class FakeConnection:
+    def __init__(self, room_id: str, maxsize: int = 64) -> None:
+        self.room_id = room_id
+        self.maxsize = maxsize
+        self.closed = False
+        self.frames: list[Frame] = []
+        self.replies: list[Frame] = []
+
+    def __len__(self) -> int:
+        return 0
+
+    def push(self, frame: Frame, reply: bool = False) -> bool:
+        self.frames.append(frame)
+        if reply:
+            self.replies.append(frame)
+        return True
+
+    @property
+    def payloads(self) -> list[dict]:
+        return [frame.message.payload for frame in self.frames]
+
+
+@pytest.fixture
+def manager() -> Manager:
+    return Manager()
+
+
+@pytest.fixture
+def room_id(manager: Manager) -> str:
+    room_id = manager.create_room(Player(name="Host"))
+    assert room_id is not None
+    return room_id
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def sync(clock: Clock) -> StateSync:
+    return StateSync(FrameCache(), history=2, retention=10, clock=clock)
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ({"a": 1, "b": {"c": 2, "d": [1]}}, {"a": 1, "b": {"c": 3, "e": None}}),
+        ({"a": 1}, {"a": 1}),
+        ({"a": {"b": 1}}, {"a": [1]}),
+        ({"a": 1}, None),
+        (None, {"a": 1}),
+    ],
+)
+def test_diff_apply(old: object, new: object) -> None:
+    ops = diff(old, new)
+
+    assert apply_patch(copy.deepcopy(old), ops) == new
+    assert (ops == []) == (old == new)
+
+
+def test_diff_minimal() -> None:
+    ops = diff(
+        {"players": {"A": {"score": 1, "cursor": 1}}},
+        {"players": {"A": {"score": 2, "cursor": 1}}},
+    )
+
+    assert ops == [{"op": "set", "path": ["players", "A", "score"], "value": 2}]
+
+
+def test_subscribe_snapshot(sync: StateSync, manager: Manager, room_id: str) -> None:
+    connection = FakeConnection(room_id)
+    sync.subscribe(manager, connection)
+
+    (snapshot,) = connection.frames
+    assert snapshot.message.type == "snapshot"
+    assert snapshot.message.payload["seq"] == 0
+    assert snapshot.message.payload["state"]["id"] == room_id
+
+    other = FakeConnection(room_id)
+    sync.subscribe(manager, other)
+    assert other.frames[0] is snapshot
+
+
+def test_flush_patches(sync: StateSync, manager: Manager, room_id: str) -> None:
+    connection = FakeConnection(room_id)
+    sync.subscribe(manager, connection)
+    state = connection.payloads[0]["state"]
+
+    sync.flush(manager)
+    assert len(connection.frames) == 1
+
+    manager.add_player(room_id, Player(name="Alice"))
+    manager.start_match(room_id)
+    sync.flush(manager)
+    sync.flush(manager)
+
+    (patch,) = connection.payloads[1:]
+    assert patch["seq"] == 1
+    state = apply_patch(state, patch["ops"])
+    assert state == manager.get_room(room_id).model_dump(mode="json")
+
+    manager.delete_room(room_id)
+    sync.flush(manager)
+    assert connection.payloads[-1]["seq"] == 2
+    assert apply_patch(state, connection.payloads[-1]["ops"]) is None
+
+
+def test_subscribe_sends_pending_patch(
+    sync: StateSync, manager: Manager, room_id: str
+) -> None:
+    connection = FakeConnection(room_id)
+    sync.subscribe(manager, connection)
+
+    manager.add_player(room_id, Player(name="Alice"))
+    late = FakeConnection(room_id)
+    sync.subscribe(manager, late)
+
+    assert connection.payloads[1]["seq"] == 1
+    assert late.payloads[0]["seq"] == 1
+    assert "Alice" in late.payloads[0]["state"]["players"]
+
+
+def test_unsubscribe(
+    sync: StateSync, manager: Manager, room_id: str, clock: Clock
+) -> None:
+    connection, closed = FakeConnection(room_id), FakeConnection(room_id)
+    sync.subscribe(manager, connection)
+    sync.subscribe(manager, closed)
+
+    closed.closed = True
+    manager.add_player(room_id, Player(name="Alice"))
+    sync.flush(manager)
+    assert sync.rooms[room_id].subscribers == {connection}
+
+    sync.unsubscribe(connection)
+    clock.now = 5
+    sync.flush(manager)
+    assert room_id in sync.rooms
+
+    clock.now = 10
+    sync.flush(manager)
+    assert sync.rooms == {}
+
+
+def test_deleted_room_untracked(
+    sync: StateSync, manager: Manager, room_id: str
+) -> None:
+    connection = FakeConnection(room_id)
+    sync.subscribe(manager, connection)
+    sync.unsubscribe(connection)
+
+    manager.delete_room(room_id)
+    sync.flush(manager)
+    assert sync.rooms == {}
+
+
+def test_epoch_unique(manager: Manager, room_id: str) -> None:
+    epochs = set()
+    for _ in range(2):
+        connection = FakeConnection(room_id)
+        StateSync(FrameCache()).subscribe(manager, connection)
+        epochs.add(connection.payloads[0]["epoch"])
+
+    assert len(epochs) == 2
+
+
+def test_resume(sync: StateSync, manager: Manager, room_id: str) -> None:
+    connection = FakeConnection(room_id)
+    sync.subscribe(manager, connection)
+    epoch = connection.payloads[0]["epoch"]
+    state = connection.payloads[0]["state"]
+    sync.unsubscribe(connection)
+
+    manager.add_player(room_id, Player(name="Alice"))
+    sync.flush(manager)
+    manager.add_player(room_id, Player(name="Bob"))
+    sync.flush(manager)
+
+    resumed = FakeConnection(room_id)
+    sync.subscribe(manager, resumed, epoch=epoch, seq=0)
+    assert [payload["seq"] for payload in resumed.payloads] == [1, 2]
+    assert resumed.replies == resumed.frames
+    for payload in resumed.payloads:
+        state = apply_patch(state, payload["ops"])
+    assert set(state["players"]) == {"Host", "Alice", "Bob"}
+
+    current = FakeConnection(room_id)
+    sync.subscribe(manager, current, epoch=epoch, seq=2)
+    assert current.frames == []
+
+
+@pytest.mark.parametrize(
+    "offset, seq",
+    [(None, None), (0, None), (1, 0), (0, 0), (0, 4), (0, "0"), (0, True)],
+)
+def test_resume_snapshot(
+    sync: StateSync,
+    manager: Manager,
+    room_id: str,
+    offset: int | None,
+    seq: object,
+) -> None:
+    first = FakeConnection(room_id)
+    sync.subscribe(manager, first)
+    for name in ("Alice", "Bob", "Carol"):
+        manager.add_player(room_id, Player(name=name))
+        sync.flush(manager)
+
+    # The client claims the current epoch, a different one, or none at all.
+    epoch = None if offset is None else first.payloads[0]["epoch"] + offset
+    connection = FakeConnection(room_id)
+    sync.subscribe(manager, connection, epoch=epoch, seq=seq)
+
+    (snapshot,) = connection.frames
+    assert snapshot.message.type == "snapshot"
+    assert snapshot.message.payload["seq"] == 3
+
+
+def test_resume_gap_over_queue(manager: Manager, room_id: str, clock: Clock) -> None:
+    sync = StateSync(FrameCache(), history=256, clock=clock)
+    first = FakeConnection(room_id)
+    sync.subscribe(manager, first)
+    epoch = first.payloads[0]["epoch"]
+
+    for n in range(10):
+        manager.add_player(room_id, Player(name=f"p{n}"))
+        sync.flush(manager)
+
+    # Ten patches do not fit in a queue of four, so a snapshot is sent.
+    websocket: Any = object()
+    connection = Connection(websocket, room_id, "Alice", maxsize=4)
+    sync.subscribe(manager, connection, epoch=epoch, seq=0)
+    assert len(connection) == 1
+    assert connection.dropped == 0
+
+    # Four patches fill the queue exactly, and are queued as replies.
+    connection = Connection(websocket, room_id, "Bob", maxsize=4)
+    sync.subscribe(manager, connection, epoch=epoch, seq=6)
+    assert len(connection) == 4
+    assert connection.dropped == 0
@@ -1,12 +1,16 @@
-import type { Room } from '../types';
+import type { Room, RoomPage } from '../types';
 import { apiRequest } from '../index';
 
 export async function getRoom(roomId: string, fetchFn: typeof fetch = fetch): Promise<Room> {
 	return apiRequest<Room>(`/rooms/${roomId}`, {}, fetchFn);
 }
 
-export async function getRooms(fetchFn: typeof fetch = fetch): Promise<Room[]> {
-	return apiRequest<Room[]>('/rooms', {}, fetchFn);
+export async function getRooms(
+	cursor: string | null = null,
+	fetchFn: typeof fetch = fetch
+): Promise<RoomPage> {
+	const query = cursor ? `?cursor=${cursor}` : '';
+	return apiRequest<RoomPage>(`/rooms${query}`, {}, fetchFn);
 }
 
 export async function createRoom(host: string, fetchFn: typeof fetch = fetch): Promise<string> {
@@ -31,7 +31,7 @@ export interface Player {
 }
 
 export interface MatchResult {
-	winner: Player;
+	winner: Player | null;
 	finalScores: Map<string, number>;
 }
 
@@ -49,3 +49,16 @@ export interface Room {
 	settings: MatchSettings;
 	match: Match | null;
 }
+
+export interface RoomSummary {
+	id: string;
+	host: string | null;
+	player_count: number;
+	status: 'waiting' | 'in_match';
+	settings_digest: string;
+}
+
+export interface RoomPage {
+	rooms: RoomSummary[];
+	next_cursor: string | null;
+}